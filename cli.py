@@ -1,3 +1,5 @@
+import asyncio
+
 import typer as typer
 import uvicorn as uvicorn
 
@@ -8,6 +10,9 @@ app = typer.Typer()
 
 @app.command()
 def run(workers: int = 1):
+    if workers > 1 and settings.CACHE_BACKEND == "memory":
+        # Кэш в памяти у каждого воркера свой: запись в одном оставит устаревшие данные в остальных
+        raise typer.BadParameter("CACHE_BACKEND=memory supports a single worker, use redis", param_hint="--workers")
     print("\n".join("%s: %s" % item for item in vars(settings).items()))
     uvicorn.run(
         "src.framework.application:app",
@@ -18,5 +23,19 @@ def run(workers: int = 1):
     )
 
 
+@app.command()
+def indexes(build: bool = False, drop: bool = False):
+    # Без флагов - только сравнение объявленных индексов Mongo с построенными
+    from src.databases import mongo
+
+    async def _indexes() -> dict:
+        if build:
+            return await mongo.indexes.build(drop=drop)
+        return {name: await mongo.indexes.diff(name) for name in mongo.INDEXES}
+
+    for name, diff in asyncio.run(_indexes()).items():
+        print(f"{name}: missing={diff.missing} changed={diff.changed} extra={diff.extra}")
+
+
 if __name__ == "__main__":
     app()
@@ -1,2 +1,5 @@
+from .exceptions import InvalidCursorError
+from .exceptions import InvalidQueryError
 from .exceptions import ObjectNotFoundError
 from .sessions import Session
+from .sessions import after_commit
@@ -4,3 +4,13 @@ from src.tools.exceptions import Error
 class ObjectNotFoundError(Error):
     status_code = 404
     description = "Object is not found. Something went wrong"
+
+
+class InvalidCursorError(Error):
+    status_code = 400
+    description = "Pagination cursor is invalid or does not match the sorting"
+
+
+class InvalidQueryError(Error):
+    status_code = 400
+    description = "Filtering or sorting by this field is not allowed"
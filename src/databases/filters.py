@@ -0,0 +1,38 @@
+from enum import Enum
+
+
+class Operator(str, Enum):
+    eq = "eq"
+    ne = "ne"
+    gt = "gt"
+    gte = "gte"
+    lt = "lt"
+    lte = "lte"
+    in_ = "in"  # value - список
+    prefix = "prefix"  # Строка начинается с value
+    is_null = "is_null"  # value: true - IS NULL, false - IS NOT NULL
+
+
+# Скалярное значение фильтра; список или null в сравнении дошел бы до драйвера базы
+SCALAR = (bool, int, str)
+
+# Какое value ожидает оператор (для сообщения об ошибке); остальные операторы - скаляр
+EXPECTED = {
+    Operator.in_: "a list of scalars",
+    Operator.prefix: "a string",
+    Operator.is_null: "a boolean",
+}
+
+
+def valid_value(operator: Operator, value: object) -> bool:
+    if operator is Operator.in_:
+        return isinstance(value, list) and all(isinstance(item, SCALAR) for item in value)
+    elif operator is Operator.prefix:
+        return isinstance(value, str)
+    elif operator is Operator.is_null:
+        return isinstance(value, bool)
+    return isinstance(value, SCALAR)
+
+
+def expected(operator: Operator) -> str:
+    return EXPECTED.get(operator, "a scalar (bool, int or str)")
@@ -0,0 +1,33 @@
+from src.databases import mongo
+from src.databases import postgres
+from src.databases.mongo.crud.base import DEFAULT_SORT
+
+
+async def unindexed() -> dict[str, list[str]]:
+    # Разрешенные для фильтрации/сортировки поля без индекса: такой запрос клиента - последовательное сканирование
+    fields = dict()
+
+    for crud in postgres.ORM.__subclasses__():
+        allowed = (crud.filterable or set()) | (crud.sortable or set())
+        if missing := allowed - await crud.indexed():
+            fields[f"postgres.{crud.table.__tablename__}"] = sorted(missing)
+
+    for crud in mongo.ORM.__subclasses__():
+        # Сортировка по умолчанию применяется к любому запросу без явной сортировки
+        allowed = (crud.filterable or set()) | (crud.sortable or set()) | {DEFAULT_SORT}
+        if missing := allowed - await crud.indexed():
+            fields[f"mongo.{crud.collection.name}"] = sorted(missing)
+
+    return fields
+
+
+async def unbuilt() -> dict[str, list[str]]:
+    # Объявленные в коллекциях Mongo индексы, которые не построены или построены с другой спецификацией
+    indexes = dict()
+
+    for name in mongo.INDEXES:
+        diff = await mongo.indexes.diff(name)
+        if missing := diff.missing + diff.changed:
+            indexes[f"mongo.{name}"] = missing
+
+    return indexes
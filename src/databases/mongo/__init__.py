@@ -1,4 +1,7 @@
+from . import indexes
+from .collections import INDEXES
 from .crud import CRUD as ORM
 from .crud import *
 from .setup import AsyncIOMotorClientSession as Session  # type:ignore
 from .setup import mongoconnect
+from .setup import pool_stats
@@ -1,2 +1,4 @@
+from .base import INDEXES
 from .base import CollectionType
+from .base import collection
 from .dummy import Dummy
@@ -1,5 +1,17 @@
+from typing import Iterable
 from typing import TypeVar
 
 from motor.motor_asyncio import AsyncIOMotorCollection
+from pymongo import IndexModel
+
+from src.databases.mongo.setup import mongodb
 
 CollectionType = TypeVar("CollectionType", bound=AsyncIOMotorCollection)
+
+# Объявленные индексы коллекций: {имя коллекции: [IndexModel]}. Строятся командой `python cli.py indexes --build`
+INDEXES: dict[str, list[IndexModel]] = dict()
+
+
+def collection(name: str, indexes: Iterable[IndexModel] = ()) -> AsyncIOMotorCollection:
+    INDEXES[name] = list(indexes)
+    return mongodb[name]
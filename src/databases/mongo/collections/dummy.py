@@ -1,3 +1,12 @@
-from src.databases.mongo.setup import mongodb
+from pymongo import ASCENDING
+from pymongo import IndexModel
 
-Dummy = mongodb["Dummy"]
+from .base import collection
+
+Dummy = collection(
+    "Dummy",
+    [
+        # Сортировка по умолчанию и keyset-пагинация: created_at + _id
+        IndexModel([("created_at", ASCENDING), ("_id", ASCENDING)], name="created_at_1__id_1"),
+    ],
+)
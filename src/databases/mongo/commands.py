@@ -0,0 +1,67 @@
+import json
+from functools import partial
+from typing import Any
+from typing import Optional
+
+from pymongo import monitoring
+
+from src.tools import queries
+
+# Части команды, которые определяют ее вид (и нужный индекс); значения в них заменяются на ?
+SHAPED = ("filter", "pipeline", "query", "updates", "deletes")
+# Части, которые попадают в отпечаток как есть: направление сортировки тоже определяет индекс
+KEPT = ("sort", "projection")
+
+
+def _shape(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {key: _shape(item) for key, item in value.items()}
+    elif isinstance(value, list):
+        # $in из тысячи id и из одного - один вид запроса
+        return [_shape(value[0])] if value else []
+    return "?"
+
+
+def fingerprint(command: dict) -> str:
+    # Первый ключ команды - ее имя, значение - коллекция: {"find": "Dummy", "filter": {...}}.
+    # У getMore значение - id курсора, коллекция передается отдельно
+    name, collection = next(iter(command.items()))
+    collection = command.get("collection", collection)
+    shape = {key: _shape(command[key]) for key in SHAPED if key in command}
+    shape.update({key: command[key] for key in KEPT if key in command})
+    statement = f"{name} {collection} {json.dumps(shape, separators=(',', ':'), default=str)}"
+    return statement[: queries.MAX_STATEMENT_LENGTH]
+
+
+def _rows(reply: dict) -> Optional[int]:
+    if cursor := reply.get("cursor"):
+        return len(cursor.get("firstBatch", cursor.get("nextBatch", [])))
+    return reply.get("n")
+
+
+class CommandListener(monitoring.CommandListener):
+    # Длительность каждой команды - в статистику текущего HTTP-запроса, медленные - сразу в лог.
+    # Motor выполняет команды в потоке executor'а с копией контекста корутины, поэтому contextvar доступен
+    def __init__(self) -> None:
+        # Команда нужна для отпечатка, но в событии завершения ее нет
+        self.commands: dict[tuple, dict] = dict()
+
+    def started(self, event: monitoring.CommandStartedEvent) -> None:
+        # Команды аутентификации pymongo передает пустыми
+        if event.command:
+            self.commands[(event.connection_id, event.request_id)] = event.command
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent) -> None:
+        command = self.commands.pop((event.connection_id, event.request_id), None)
+        if command is None:
+            return
+
+        rows = _rows(event.reply or dict())
+        queries.observe("mongo", partial(fingerprint, command), event.duration_micros / 1_000_000, rows)
+
+    def failed(self, event: monitoring.CommandFailedEvent) -> None:
+        command = self.commands.pop((event.connection_id, event.request_id), None)
+        if command is None:
+            return
+
+        queries.observe("mongo", partial(fingerprint, command), event.duration_micros / 1_000_000)
@@ -1,41 +1,162 @@
+import asyncio
+import re
 from typing import Any
+from typing import AsyncIterator
+from typing import Optional
 
+from bson import ObjectId
+from bson.errors import InvalidId
+from motor.motor_asyncio import AsyncIOMotorCursor
 from pymongo import ASCENDING
 from pymongo import DESCENDING
+from pymongo import UpdateOne
 
+from src.databases.exceptions import InvalidQueryError
 from src.databases.exceptions import ObjectNotFoundError
+from src.databases.filters import Operator
+from src.databases.filters import valid_value
 from src.databases.mongo.collections import CollectionType
 from src.databases.mongo.setup import AsyncIOMotorClientSession
+from src.databases.pagination import COUNT_CAP
+from src.databases.pagination import Count
+from src.databases.pagination import Total
+from src.databases.pagination import capped
+from src.databases.pagination import decode_cursor
+from src.databases.pagination import encode_cursor
+
+# Сортировка, когда клиент ее не задал; вместе с _id должна быть покрыта индексом коллекции
+DEFAULT_SORT = "created_at"
 
 
 class CRUD:
     collection: CollectionType
+    # Поля, по которым клиент может фильтровать и сортировать (None - любые). Должны быть покрыты индексами
+    filterable: Optional[set[str]] = None
+    sortable: Optional[set[str]] = None
 
     @classmethod
     def _query(cls, query: dict) -> tuple[dict, list, int, int]:
         _filters, _sorting, _pagination = [query.get(key, None) for key in ["filters", "sorting", "pagination"]]
 
-        filters = dict()
+        # Каждое условие - отдельный элемент $and: несколько условий на одно поле не перезаписывают друг друга
+        clauses = []
         for _filter in _filters:
-            filters[_filter["field"]] = _filter["value"]
+            if cls.filterable is not None and _filter["field"] not in cls.filterable:
+                raise InvalidQueryError
+            operator, value = Operator(_filter.get("operator", Operator.eq)), _filter["value"]
+            if not valid_value(operator, value):
+                raise InvalidQueryError
+            clauses.append({_filter["field"]: cls._filter(operator, cls._value(_filter["field"], operator, value))})
+
+        filters = {"$and": clauses} if len(clauses) > 1 else next(iter(clauses), dict())
 
         sorting = []
         for _sort in _sorting:
+            if cls.sortable is not None and _sort["field"] not in cls.sortable:
+                raise InvalidQueryError
             if _sort["type"] == "desc":
                 sorting.append((_sort["field"], DESCENDING))
             else:
                 sorting.append((_sort["field"], ASCENDING))
 
         if not sorting:
-            sorting.append(("created_at", ASCENDING))
+            sorting.append((DEFAULT_SORT, ASCENDING))
 
         limit, offset = _pagination.get("limit", 10), _pagination.get("offset", 0)
 
         return filters, sorting, limit, offset
 
     @classmethod
-    async def get(cls, session: AsyncIOMotorClientSession, field: str, value: Any) -> CollectionType:
-        document = await cls.collection.find_one({field: value}, session=session)
+    def _value(cls, field: str, operator: Operator, value: Any) -> Any:
+        # _id хранится как ObjectId: строка из запроса клиента с ним не совпадет
+        if field != "_id" or operator is Operator.is_null:
+            return value
+        elif operator is Operator.prefix:
+            raise InvalidQueryError
+        try:
+            return [ObjectId(item) for item in value] if operator is Operator.in_ else ObjectId(value)
+        except (InvalidId, TypeError):
+            raise InvalidQueryError
+
+    @classmethod
+    def _filter(cls, operator: Operator, value: Any) -> Any:
+        if operator is Operator.ne:
+            return {"$ne": value}
+        elif operator is Operator.gt:
+            return {"$gt": value}
+        elif operator is Operator.gte:
+            return {"$gte": value}
+        elif operator is Operator.lt:
+            return {"$lt": value}
+        elif operator is Operator.lte:
+            return {"$lte": value}
+        elif operator is Operator.in_:
+            return {"$in": list(value)}
+        elif operator is Operator.prefix:
+            # Якорный регулярный префикс без флагов использует индекс
+            return {"$regex": f"^{re.escape(value)}"}
+        elif operator is Operator.is_null:
+            # null совпадает и с отсутствующим полем
+            return {"$eq": None} if value else {"$ne": None}
+        return value
+
+    @classmethod
+    async def indexed(cls) -> set[str]:
+        # Поля, с которых начинается хотя бы один индекс коллекции
+        indexes = await cls.collection.index_information()
+        return {index["key"][0][0] for index in indexes.values()}
+
+    @classmethod
+    def _keys(cls, sorting: list) -> list[tuple[str, int]]:
+        # Ключи keyset-пагинации: поля сортировки + _id для однозначного порядка
+        keys = list(sorting)
+        if "_id" not in [field for field, _ in keys]:
+            keys.append(("_id", keys[-1][1]))
+        return keys
+
+    @classmethod
+    def _seek(cls, keys: list[tuple[str, int]], values: list[Any]) -> dict:
+        # {$or: [{k1: {$gt: v1}}, {k1: v1, _id: {$gt: v2}}]}
+        clauses = []
+        for index, (field, direction) in enumerate(keys):
+            clause = {keys[i][0]: values[i] for i in range(index)}
+            clause[field] = {"$lt" if direction == DESCENDING else "$gt": values[index]}
+            clauses.append(clause)
+        return {"$or": clauses}
+
+    @classmethod
+    async def _count(cls, session: Optional[AsyncIOMotorClientSession], filters: dict, count: Count) -> Total:
+        if count is Count.none:
+            return Total(None, Count.none)
+        elif count is Count.estimated and not filters:
+            # Метаданные коллекции, без сканирования; не поддерживает сессии
+            return Total(await cls.collection.estimated_document_count(), Count.estimated)
+        elif count in [Count.estimated, Count.capped]:
+            # Для фильтра оценки нет - считаем с ограничением
+            return capped(await cls.collection.count_documents(filters, limit=COUNT_CAP + 1, session=session))
+        return Total(await cls.collection.count_documents(filters, session=session), Count.exact)
+
+    @classmethod
+    def _projection(cls, fields: Optional[list[str]]) -> Optional[dict]:
+        # fields - проекция: сервер возвращает только нужные поля (_id - всегда)
+        if not fields:
+            return None
+        return {field: 1 for field in fields}
+
+    @classmethod
+    def cursor(cls, keys: list[tuple[str, int]], document: dict) -> str:
+        fields = [field for field, _ in keys]
+        return encode_cursor(fields, [document.get(field) for field in fields])
+
+    @classmethod
+    async def get(
+        cls,
+        session: AsyncIOMotorClientSession,
+        field: str,
+        value: Any,
+        fields: Optional[list[str]] = None,
+    ) -> CollectionType:
+        document = await cls.collection.find_one({field: value}, cls._projection(fields), session=session)
         if not document:
             raise ObjectNotFoundError
         return document
@@ -48,22 +169,114 @@ class CRUD:
         return document
 
     @classmethod
-    async def get_list(cls, session: AsyncIOMotorClientSession, field: str, value: Any) -> list[CollectionType]:
-        return await (cls.collection.find({field: value}, session=session)).to_list(length=None)
+    async def get_list(
+        cls,
+        session: AsyncIOMotorClientSession,
+        field: str,
+        value: Any,
+        fields: Optional[list[str]] = None,
+    ) -> list[CollectionType]:
+        if isinstance(value, list):
+            value = {"$in": value}
+        return await (cls.collection.find({field: value}, cls._projection(fields), session=session)).to_list(
+            length=None
+        )
 
     @classmethod
-    async def get_paginated(cls, session: AsyncIOMotorClientSession, query: dict) -> tuple[list[CollectionType], int]:
+    async def get_paginated(
+        cls,
+        session: AsyncIOMotorClientSession,
+        query: dict,
+        concurrently: bool = False,
+        fields: Optional[list[str]] = None,
+    ) -> tuple[list[CollectionType], Total, Optional[str]]:
+        if "cursor" in query["pagination"]:
+            return await cls.get_paginated_by_cursor(session, query, concurrently, fields)
+
         filters, sorting, limit, offset = cls._query(query)
-        documents = await (
-            cls.collection.find(filters, session=session).sort(sorting).skip(offset).limit(limit).to_list(length=None)
+        documents, total = await cls._page(
+            session,
+            cls.collection.find(filters, cls._projection(fields), session=session)
+            .sort(sorting)
+            .skip(offset)
+            .limit(limit),
+            filters,
+            query.get("count", Count.exact),
+            concurrently,
         )
-        total = await cls.collection.count_documents(filters, session=session)
-        return documents, total
+        return documents, total, None
+
+    @classmethod
+    async def get_paginated_by_cursor(
+        cls,
+        session: AsyncIOMotorClientSession,
+        query: dict,
+        concurrently: bool = False,
+        fields: Optional[list[str]] = None,
+    ) -> tuple[list[CollectionType], Total, Optional[str]]:
+        filters, sorting, limit, _ = cls._query(query)
+        keys = cls._keys(sorting)
+
+        # Поля сортировки нужны для курсора следующей страницы
+        projection = cls._projection(fields and [*fields, *[field for field, _ in keys]])
+
+        seek = filters
+        if cursor := query["pagination"]["cursor"]:
+            predicate = cls._seek(keys, decode_cursor([field for field, _ in keys], cursor))
+            seek = {"$and": [filters, predicate]} if filters else predicate
+
+        # Запрашиваем на один документ больше, чтобы понять есть ли следующая страница
+        documents, total = await cls._page(
+            session,
+            cls.collection.find(seek, projection, session=session).sort(keys).limit(limit + 1),
+            filters,
+            query.get("count", Count.exact),
+            concurrently,
+        )
+        if len(documents) > limit:
+            documents = documents[:limit]
+            return documents, total, cls.cursor(keys, documents[-1])
+
+        return documents, total, None
+
+    @classmethod
+    async def stream(
+        cls,
+        session: AsyncIOMotorClientSession,
+        query: dict,
+        fields: Optional[list[str]] = None,
+        batch_size: int = 1000,
+    ) -> AsyncIterator[CollectionType]:
+        # Курсор сервера: документы приходят пачками по batch_size (getMore), а не списком целиком
+        filters, sorting, _, _ = cls._query({"filters": [], "sorting": [], "pagination": {}, **query})
+        cursor = cls.collection.find(filters, cls._projection(fields), session=session).sort(sorting)
+        async for document in cursor.batch_size(batch_size):
+            yield document
+
+    @classmethod
+    async def _page(
+        cls,
+        session: AsyncIOMotorClientSession,
+        cursor: AsyncIOMotorCursor,
+        filters: dict,
+        count: Count,
+        concurrently: bool,
+    ) -> tuple[list[CollectionType], Total]:
+        # Сессию нельзя использовать конкурентно, поэтому параллельный подсчет идет без нее.
+        # Только вне транзакции: иначе подсчет не увидит ее незакоммиченных изменений.
+        if concurrently and not session.in_transaction:
+            documents, total = await asyncio.gather(cursor.to_list(length=None), cls._count(None, filters, count))
+            return documents, total
+
+        total = await cls._count(session, filters, count)
+        return await cursor.to_list(length=None), total
 
     @classmethod
     async def create(cls, session: AsyncIOMotorClientSession, model: dict) -> CollectionType:
-        instance = await cls.collection.insert_one(model, session=session)
-        return await cls.get(session, field="_id", value=instance.inserted_id)
+        # insert_one проставляет _id в переданный документ - повторно читать его из базы не нужно
+        document = dict(model)
+        await cls.collection.insert_one(document, session=session)
+        return document
 
     @classmethod
     async def update(cls, session: AsyncIOMotorClientSession, field: str, value: Any, **kwargs) -> None:
@@ -72,3 +285,30 @@ class CRUD:
     @classmethod
     async def delete(cls, session: AsyncIOMotorClientSession, field: str, value: Any) -> None:
         await cls.collection.delete_one({field: value}, session=session)
+
+    @classmethod
+    async def create_many(
+        cls,
+        session: AsyncIOMotorClientSession,
+        models: list[dict],
+        ordered: bool = True,
+    ) -> list[CollectionType]:
+        # ordered=False - сервер вставляет пачку без остановки на первой ошибке (BulkWriteError после вставки)
+        documents = [dict(model) for model in models]
+        if documents:
+            await cls.collection.insert_many(documents, ordered=ordered, session=session)
+        return documents
+
+    @classmethod
+    async def update_many(cls, session: AsyncIOMotorClientSession, field: str, models: list[dict]) -> None:
+        # Один bulk_write вместо update_one на каждый документ; драйвер сам режет на пачки по maxWriteBatchSize
+        operations = [
+            UpdateOne({field: model[field]}, {"$set": {k: v for k, v in model.items() if k != field}})
+            for model in models
+        ]
+        if operations:
+            await cls.collection.bulk_write(operations, ordered=False, session=session)
+
+    @classmethod
+    async def delete_many(cls, session: AsyncIOMotorClientSession, field: str, value: list) -> None:
+        await cls.collection.delete_many({field: {"$in": value}}, session=session)
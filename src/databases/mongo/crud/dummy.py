@@ -5,3 +5,5 @@ from .base import CRUD
 
 class Dummy(CRUD):
     collection = collections.Dummy
+    filterable = {"_id"}
+    sortable = {"_id"}
@@ -0,0 +1,70 @@
+from typing import Any
+from typing import NamedTuple
+
+from pymongo import IndexModel
+
+from src.databases.mongo.collections import INDEXES
+from src.databases.mongo.setup import mongodb
+
+# Опции, различие в которых означает другой индекс (такой нельзя изменить - только пересоздать)
+OPTIONS = ("unique", "sparse", "expireAfterSeconds", "partialFilterExpression", "collation")
+
+
+class Diff(NamedTuple):
+    missing: list[str]  # Объявлены, но не построены
+    changed: list[str]  # Построены с другими ключами или опциями
+    extra: list[str]  # Построены, но не объявлены
+
+    def __bool__(self) -> bool:
+        return bool(self.missing or self.changed or self.extra)
+
+
+def _spec(document: dict) -> dict[str, Any]:
+    # index_information возвращает направления как float (1.0) - приводим к int
+    keys = [
+        (field, int(order) if isinstance(order, (int, float)) else order) for field, order in document["key"].items()
+    ]
+    return dict(
+        key=keys, **{option: document[option] for option in OPTIONS if document.get(option) not in (None, False)}
+    )
+
+
+def _declared(indexes: list[IndexModel]) -> dict[str, dict[str, Any]]:
+    return {index.document["name"]: _spec(index.document) for index in indexes}
+
+
+async def _existing(name: str) -> dict[str, dict[str, Any]]:
+    information = await mongodb[name].index_information()
+    return {
+        index: _spec({**document, "key": dict(document["key"])})
+        for index, document in information.items()
+        if index != "_id_"
+    }
+
+
+async def diff(name: str) -> Diff:
+    declared, existing = _declared(INDEXES[name]), await _existing(name)
+    return Diff(
+        missing=[index for index in declared if index not in existing],
+        changed=[index for index in declared if index in existing and declared[index] != existing[index]],
+        extra=[index for index in existing if index not in declared],
+    )
+
+
+async def build(drop: bool = False) -> dict[str, Diff]:
+    # Строит недостающие индексы. С drop=True пересоздает измененные и удаляет необъявленные
+    diffs = dict()
+
+    for name, indexes in INDEXES.items():
+        diffs[name] = _diff = await diff(name)
+
+        if drop:
+            for index in _diff.changed + _diff.extra:
+                await mongodb[name].drop_index(index)
+
+        create = _diff.missing + (_diff.changed if drop else [])
+        if create:
+            # Начиная с MongoDB 4.2 сборка блокирует коллекцию только в начале и в конце
+            await mongodb[name].create_indexes([index for index in indexes if index.document["name"] in create])
+
+    return diffs
@@ -0,0 +1,61 @@
+import threading
+from typing import Union
+
+from pymongo import monitoring
+
+from src.tools.metrics import Histogram
+
+
+class PoolListener(monitoring.ConnectionPoolListener):
+    # События приходят из потоков executor'а Motor: счетчики меняются под блокировкой
+    def __init__(self) -> None:
+        self.checked_out = 0
+        self.waiters = 0
+        self.wait_time = Histogram()
+        self._lock = threading.Lock()
+
+    def connection_check_out_started(self, event: monitoring.ConnectionCheckOutStartedEvent) -> None:
+        with self._lock:
+            self.waiters += 1
+
+    def connection_checked_out(self, event: monitoring.ConnectionCheckedOutEvent) -> None:
+        with self._lock:
+            self.waiters -= 1
+            self.checked_out += 1
+        self._observe(event)
+
+    def connection_check_out_failed(self, event: monitoring.ConnectionCheckOutFailedEvent) -> None:
+        with self._lock:
+            self.waiters -= 1
+        self._observe(event)
+
+    def connection_checked_in(self, event: monitoring.ConnectionCheckedInEvent) -> None:
+        with self._lock:
+            self.checked_out -= 1
+
+    def _observe(
+        self,
+        event: Union[monitoring.ConnectionCheckedOutEvent, monitoring.ConnectionCheckOutFailedEvent],
+    ) -> None:
+        # duration есть в событиях начиная с pymongo 4.7
+        if (duration := getattr(event, "duration", None)) is not None:
+            self.wait_time.observe(duration)
+
+    def pool_created(self, event: monitoring.PoolCreatedEvent) -> None: ...
+
+    def pool_ready(self, event: monitoring.PoolReadyEvent) -> None: ...
+
+    def pool_cleared(self, event: monitoring.PoolClearedEvent) -> None: ...
+
+    def pool_closed(self, event: monitoring.PoolClosedEvent) -> None: ...
+
+    def connection_created(self, event: monitoring.ConnectionCreatedEvent) -> None: ...
+
+    def connection_ready(self, event: monitoring.ConnectionReadyEvent) -> None: ...
+
+    def connection_closed(self, event: monitoring.ConnectionClosedEvent) -> None: ...
+
+    def stats(self) -> dict:
+        with self._lock:
+            checked_out, waiters = self.checked_out, self.waiters
+        return dict(checked_out=checked_out, waiters=waiters, wait_time=self.wait_time.to_dict())
@@ -4,17 +4,45 @@ from motor.motor_asyncio import AsyncIOMotorClient
 from motor.motor_asyncio import AsyncIOMotorClientSession
 
 from src.framework import settings
+from src.framework.logger import logger
 
-client = AsyncIOMotorClient(settings.MONGO_URI)
+from .commands import CommandListener
+from .pool import PoolListener
+
+pool_listener = PoolListener()
+
+command_listener = CommandListener()
+
+client = AsyncIOMotorClient(
+    settings.MONGO_URI,
+    maxPoolSize=settings.MONGO_MAX_POOL_SIZE,
+    minPoolSize=settings.MONGO_MIN_POOL_SIZE,
+    maxIdleTimeMS=settings.MONGO_MAX_IDLE_TIME_MS,
+    waitQueueTimeoutMS=settings.MONGO_WAIT_QUEUE_TIMEOUT_MS,
+    event_listeners=[pool_listener, command_listener],
+)
 
 mongodb = client[settings.MONGO_DB]
 
 
+def pool_stats() -> dict:
+    return pool_listener.stats()
+
+
 @asynccontextmanager
 async def mongoconnect(transaction: bool = False) -> AsyncIOMotorClientSession:
     async with await client.start_session() as session:
         if transaction:
+            # Колбэки после коммита (инвалидация кэша): до коммита параллельное чтение видит старые данные
+            session.after_commit = []
             async with session.start_transaction() as _:
                 yield session
+            # Транзакция уже закоммичена: ошибка колбэка (кэш недоступен) не превращает успешную запись в ошибку
+            # и не отменяет остальные колбэки
+            for callback in session.after_commit:
+                try:
+                    await callback()
+                except Exception as e:
+                    await logger.error(f"After-commit callback failed: {e}", callback=repr(callback))
         else:
             yield session
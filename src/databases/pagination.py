@@ -0,0 +1,90 @@
+import base64
+import json
+from datetime import date
+from datetime import datetime
+from decimal import Decimal
+from enum import Enum
+from typing import Any
+from typing import NamedTuple
+from typing import Optional
+from uuid import UUID
+
+from bson import ObjectId
+
+from .exceptions import InvalidCursorError
+
+# Предел для Count.capped: считаем не более COUNT_CAP + 1 строк
+COUNT_CAP = 1000
+
+
+class Count(str, Enum):
+    exact = "exact"
+    none = "none"
+    estimated = "estimated"
+    capped = "capped"
+
+
+class Total(NamedTuple):
+    value: Optional[int]
+    kind: Count
+
+
+def capped(count: int) -> Total:
+    # Если строк не больше предела - подсчет точный, иначе известно только "больше COUNT_CAP"
+    if count > COUNT_CAP:
+        return Total(COUNT_CAP, Count.capped)
+    return Total(count, Count.exact)
+
+
+def _encode(value: Any) -> Any:
+    # Типы, которые не переживают JSON, сохраняются с тегом для обратного восстановления
+    if isinstance(value, datetime):
+        return {"$dt": value.isoformat()}
+    elif isinstance(value, date):
+        return {"$d": value.isoformat()}
+    elif isinstance(value, Decimal):
+        return {"$dec": str(value)}
+    elif isinstance(value, UUID):
+        return {"$uuid": str(value)}
+    elif isinstance(value, ObjectId):
+        return {"$oid": str(value)}
+    elif isinstance(value, Enum):
+        return value.value
+    return value
+
+
+def _decode(value: Any) -> Any:
+    if not isinstance(value, dict):
+        return value
+
+    (tag, raw), *_ = value.items()
+    if tag == "$dt":
+        return datetime.fromisoformat(raw)
+    elif tag == "$d":
+        return date.fromisoformat(raw)
+    elif tag == "$dec":
+        return Decimal(raw)
+    elif tag == "$uuid":
+        return UUID(raw)
+    elif tag == "$oid":
+        return ObjectId(raw)
+    raise ValueError(tag)
+
+
+def encode_cursor(fields: list[str], values: list[Any]) -> str:
+    payload = json.dumps({"k": fields, "v": [_encode(value) for value in values]}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(fields: list[str], cursor: str) -> list[Any]:
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        keys, values = payload["k"], [_decode(value) for value in payload["v"]]
+    except Exception:
+        raise InvalidCursorError
+
+    # Курсор валиден только для той же сортировки, по которой он был выдан
+    if keys != fields or len(values) != len(fields):
+        raise InvalidCursorError
+
+    return values
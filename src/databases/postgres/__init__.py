@@ -2,3 +2,6 @@ from .crud import CRUD as ORM
 from .crud import *
 from .setup import AsyncSession as Session  # type:ignore
 from .setup import pgconnect
+from .setup import pinned
+from .setup import pool_stats
+from .setup import statement_stats
@@ -1,20 +1,86 @@
+import asyncio
+import json
+from collections import defaultdict
+from functools import cache
 from typing import Any
+from typing import AsyncIterator
+from typing import Iterator
+from typing import Optional
 
+from pydantic import TypeAdapter
+from sqlalchemy import and_
+from sqlalchemy import any_
+from sqlalchemy import bindparam
+from sqlalchemy import column
 from sqlalchemy import delete
 from sqlalchemy import desc
 from sqlalchemy import func
+from sqlalchemy import inspect
+from sqlalchemy import or_
 from sqlalchemy import select
+from sqlalchemy import text
+from sqlalchemy import tuple_
 from sqlalchemy import update
+from sqlalchemy import values
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.exc import NoResultFound
+from sqlalchemy.orm import InstrumentedAttribute
+from sqlalchemy.sql import ColumnElement
 from sqlalchemy.sql import Select
 
+from src.databases.exceptions import InvalidCursorError
+from src.databases.exceptions import InvalidQueryError
 from src.databases.exceptions import ObjectNotFoundError
+from src.databases.filters import Operator
+from src.databases.filters import valid_value
+from src.databases.pagination import COUNT_CAP
+from src.databases.pagination import Count
+from src.databases.pagination import Total
+from src.databases.pagination import capped
+from src.databases.pagination import decode_cursor
+from src.databases.pagination import encode_cursor
 from src.databases.postgres.setup import AsyncSession
+from src.databases.postgres.setup import pgconnect
 from src.databases.postgres.tables import TableType
 
+# Предел параметров одного запроса в протоколе PostgreSQL
+MAX_PARAMETERS = 32767
+
+# Колонки таблиц {класс таблицы: {поле: атрибут}} - разрешаются один раз на таблицу
+_COLUMNS: dict[type, dict[str, InstrumentedAttribute]] = dict()
+
+
+@cache
+def _adapter(python_type: type) -> TypeAdapter:
+    return TypeAdapter(python_type)
+
 
 class CRUD:
     table: TableType
+    # Поля, по которым клиент может фильтровать и сортировать (None - любые). Должны быть покрыты индексами
+    filterable: Optional[set[str]] = None
+    sortable: Optional[set[str]] = None
+
+    @classmethod
+    def columns(cls) -> dict[str, InstrumentedAttribute]:
+        if cls.table not in _COLUMNS:
+            attributes = inspect(cls.table).column_attrs
+            _COLUMNS[cls.table] = {attribute.key: getattr(cls.table, attribute.key) for attribute in attributes}
+        return _COLUMNS[cls.table]
+
+    @classmethod
+    def column(cls, field: str) -> InstrumentedAttribute:
+        return cls.columns()[field]
+
+    @classmethod
+    def _match(cls, field: str, value: Any) -> ColumnElement:
+        # Список - "= ANY(:array)" одним параметром-массивом: текст SQL не зависит от длины списка и prepared
+        # statement asyncpg переиспользуется (IN (...) раскрывается в новый текст для каждой длины списка)
+        column = cls.column(field)
+        if isinstance(value, list):
+            return column == any_(bindparam(field, value, type_=ARRAY(column.type), unique=True))
+        return column == value
 
     @classmethod
     def _query(cls, query: dict) -> tuple[list, list, int, int]:
@@ -22,62 +88,273 @@ class CRUD:
 
         filters = []
         for _filter in _filters:
-            filters.append(getattr(cls.table, _filter["field"]) == _filter["value"])
+            if cls.filterable is not None and _filter["field"] not in cls.filterable:
+                raise InvalidQueryError
+            operator, value = Operator(_filter.get("operator", Operator.eq)), _filter["value"]
+            if _filter["field"] not in cls.columns() or not valid_value(operator, value):
+                raise InvalidQueryError
+            filters.append(cls._filter(_filter["field"], operator, cls._value(_filter["field"], operator, value)))
 
         sorting = []
         for _sort in _sorting:
+            if cls.sortable is not None and _sort["field"] not in cls.sortable:
+                raise InvalidQueryError
             if _sort["type"] == "desc":
-                sorting.append(desc(getattr(cls.table, _sort["field"])))
+                sorting.append(desc(cls.column(_sort["field"])))
             else:
-                sorting.append(getattr(cls.table, _sort["field"]))
+                sorting.append(cls.column(_sort["field"]))
 
         limit, offset = _pagination.get("limit", 10), _pagination.get("offset", 0)
 
         return filters, sorting, limit, offset
 
     @classmethod
-    async def get(cls, session: AsyncSession, field: str, value: Any) -> TableType:
-        query = select(cls.table).where(getattr(cls.table, field) == value)
-        return await get_one(session, query)
+    def coerce(cls, field: str, value: Any) -> Any:
+        # Значение из запроса приводится к типу колонки (ISO-строка - к datetime, "1" - к int). Параметр
+        # неверного типа asyncpg отклоняет только при выполнении запроса - клиент получил бы 500.
+        # ValueError - значение к типу не приводится
+        try:
+            python_type = cls.column(field).type.python_type
+        except NotImplementedError:
+            return value
+        return value if value is None else _adapter(python_type).validate_python(value)
 
     @classmethod
-    async def get_by_kwargs(cls, session: AsyncSession, **kwargs) -> TableType:
-        filters = []
+    def _value(cls, field: str, operator: Operator, value: Any) -> Any:
+        if operator is Operator.is_null:
+            return value
+        try:
+            if operator is Operator.in_:
+                return [cls.coerce(field, item) for item in value]
+            elif operator is Operator.prefix and cls.column(field).type.python_type is not str:
+                # LIKE по нестроковой колонке PostgreSQL не выполнит
+                raise InvalidQueryError
+            return cls.coerce(field, value)
+        except (ValueError, NotImplementedError):
+            raise InvalidQueryError
 
-        for key in kwargs.keys():
-            if isinstance(kwargs[key], list):
-                filters.append(getattr(cls.table, key).in_(kwargs[key]))
-            else:
-                filters.append(getattr(cls.table, key) == kwargs[key])
+    @classmethod
+    def _filter(cls, field: str, operator: Operator, value: Any) -> ColumnElement:
+        column = cls.column(field)
 
-        query = select(cls.table).where(*filters)
+        if operator is Operator.ne:
+            return column != value
+        elif operator is Operator.gt:
+            return column > value
+        elif operator is Operator.gte:
+            return column >= value
+        elif operator is Operator.lt:
+            return column < value
+        elif operator is Operator.lte:
+            return column <= value
+        elif operator is Operator.in_:
+            return cls._match(field, list(value))
+        elif operator is Operator.prefix:
+            # Шаблон собирается здесь, а не в SQL (LIKE :value || '%'): префикс виден планировщику,
+            # и btree-индекс (text_pattern_ops или C collation) используется
+            escaped = value.replace("/", "//").replace("%", "/%").replace("_", "/_")
+            return column.like(f"{escaped}%", escape="/")
+        elif operator is Operator.is_null:
+            return column.is_(None) if value else column.is_not(None)
+        return column == value
 
-        return await get_one(session, query)
+    @classmethod
+    async def indexed(cls) -> set[str]:
+        # Поля, с которых начинается хотя бы один индекс таблицы - по каталогу базы, а не по metadata:
+        # объявленный в таблице индекс может быть еще не создан миграцией. PK и UNIQUE - тоже индексы
+        names = {attribute.expression.name: field for field, attribute in cls.columns().items()}
+        async with pgconnect() as session:
+            leading = await get_leading_columns(session, cls.table)
+        return {names[name] for name in leading if name in names}
 
     @classmethod
-    async def get_list(cls, session: AsyncSession, field: str, value: Any) -> list[TableType]:
-        filters = []
+    def _keys(cls, query: dict) -> list[tuple[str, bool]]:
+        # Ключи keyset-пагинации: поля сортировки + первичный ключ для однозначного порядка
+        keys = [(_sort["field"], _sort["type"] == "desc") for _sort in query.get("sorting", [])]
 
-        if isinstance(value, list):
-            filters.append(getattr(cls.table, field).in_(value))
-        else:
-            filters.append(getattr(cls.table, field) == value)
+        pk = inspect(cls.table).primary_key[0].key
+        if pk not in [field for field, _ in keys]:
+            keys.append((pk, keys[-1][1] if keys else False))
+
+        return keys
+
+    @classmethod
+    def _cursor_values(cls, keys: list[tuple[str, bool]], cursor: str) -> list[Any]:
+        # Курсор приходит от клиента: значение не того типа (строка вместо id) asyncpg отклонил бы с 500
+        values = decode_cursor([field for field, _ in keys], cursor)
+        try:
+            return [cls.coerce(field, value) for (field, _), value in zip(keys, values)]
+        except ValueError:
+            raise InvalidCursorError
+
+    @classmethod
+    def _seek(cls, keys: list[tuple[str, bool]], values: list[Any]) -> ColumnElement:
+        columns = [cls.column(field) for field, _ in keys]
+
+        # Одно направление сортировки: WHERE (k1, id) > (:k1, :id) - использует составной индекс
+        if len({descending for _, descending in keys}) == 1:
+            lhs = tuple_(*columns)
+            rhs = tuple_(*values, types=[_column.type for _column in columns])
+            return lhs < rhs if keys[0][1] else lhs > rhs
+
+        # Смешанные направления: k1 > :k1 OR (k1 = :k1 AND id < :id) ...
+        clauses = []
+        for index, (_column, (_, descending)) in enumerate(zip(columns, keys)):
+            equals = [columns[i] == values[i] for i in range(index)]
+            clauses.append(and_(*equals, _column < values[index] if descending else _column > values[index]))
+
+        return or_(*clauses)
+
+    @classmethod
+    async def _count(cls, session: AsyncSession, query: Select, filters: list, count: Count) -> Total:
+        if count is Count.none:
+            return Total(None, Count.none)
+        elif count is Count.estimated:
+            if not filters and (estimated := await get_reltuples(session, cls.table)) >= 0:
+                return Total(estimated, Count.estimated)
+            return Total(await get_estimated_count(session, query), Count.estimated)
+        elif count is Count.capped:
+            return capped(await get_count(session, query.limit(COUNT_CAP + 1)))
+        return Total(await get_count(session, query), Count.exact)
+
+    @classmethod
+    def _select(cls, fields: Optional[list[str]] = None) -> Select:
+        # fields - проекция: SELECT только нужных колонок (первичный ключ - всегда), строки возвращаются как Row
+        if not fields:
+            return select(cls.table)
+
+        pk = inspect(cls.table).primary_key[0].key
+        return select(*[cls.column(field) for field in dict.fromkeys([pk, *fields])])
+
+    @classmethod
+    def cursor(cls, keys: list[tuple[str, bool]], row: TableType) -> str:
+        fields = [field for field, _ in keys]
+        return encode_cursor(fields, [getattr(row, field) for field in fields])
+
+    @classmethod
+    async def get(cls, session: AsyncSession, field: str, value: Any, fields: Optional[list[str]] = None) -> TableType:
+        query = cls._select(fields).where(cls.column(field) == value)
+        return await get_one(session, query)
+
+    @classmethod
+    async def get_by_kwargs(cls, session: AsyncSession, **kwargs) -> TableType:
+        filters = [cls._match(key, value) for key, value in kwargs.items()]
 
         query = select(cls.table).where(*filters)
 
+        return await get_one(session, query)
+
+    @classmethod
+    async def get_list(
+        cls,
+        session: AsyncSession,
+        field: str,
+        value: Any,
+        fields: Optional[list[str]] = None,
+    ) -> list[TableType]:
+        query = cls._select(fields).where(cls._match(field, value))
+
         return await get_list(session, query)
 
     @classmethod
-    async def get_paginated(cls, session: AsyncSession, query: dict) -> tuple[list[TableType], int]:
+    async def get_paginated(
+        cls,
+        session: AsyncSession,
+        query: dict,
+        concurrently: bool = False,
+        fields: Optional[list[str]] = None,
+    ) -> tuple[list[TableType], Total, Optional[str]]:
+        if "cursor" in query["pagination"]:
+            return await cls.get_paginated_by_cursor(session, query, concurrently, fields)
+
         filters, sorting, limit, offset = cls._query(query)
-        query = select(cls.table).where(*filters).order_by(*sorting)
-        total = await get_count(session, query)
-        rows = await get_list(session, query.limit(limit).offset(offset))
-        return rows, total
+        query, count = cls._select(fields).where(*filters).order_by(*sorting), query.get("count", Count.exact)
+        rows, total = await cls._page(session, query.limit(limit).offset(offset), query, filters, count, concurrently)
+        return rows, total, None
+
+    @classmethod
+    async def get_paginated_by_cursor(
+        cls,
+        session: AsyncSession,
+        query: dict,
+        concurrently: bool = False,
+        fields: Optional[list[str]] = None,
+    ) -> tuple[list[TableType], Total, Optional[str]]:
+        filters, _, limit, _ = cls._query(query)
+        keys = cls._keys(query)
+
+        # Поля сортировки нужны для курсора следующей страницы
+        columns = fields and [*fields, *[field for field, _ in keys]]
+
+        sorting = []
+        for field, descending in keys:
+            sorting.append(desc(cls.column(field)) if descending else cls.column(field))
+
+        seek = []
+        if cursor := query["pagination"]["cursor"]:
+            seek.append(cls._seek(keys, cls._cursor_values(keys, cursor)))
+
+        # Запрашиваем на одну строку больше, чтобы понять есть ли следующая страница
+        rows, total = await cls._page(
+            session,
+            cls._select(columns).where(*filters, *seek).order_by(*sorting).limit(limit + 1),
+            select(cls.table).where(*filters),
+            filters,
+            query.get("count", Count.exact),
+            concurrently,
+        )
+        if len(rows) > limit:
+            rows = rows[:limit]
+            return rows, total, cls.cursor(keys, rows[-1])
+
+        return rows, total, None
+
+    @classmethod
+    async def stream(
+        cls,
+        session: AsyncSession,
+        query: dict,
+        fields: Optional[list[str]] = None,
+        batch_size: int = 1000,
+    ) -> AsyncIterator[TableType]:
+        # Серверный курсор: строки читаются пачками по batch_size, а не загружаются все сразу.
+        # Нужна сессия pgconnect(stream=True) - курсор asyncpg работает только внутри транзакции
+        filters, sorting, _, _ = cls._query({"filters": [], "sorting": [], "pagination": {}, **query})
+        statement = cls._select(fields).where(*filters).order_by(*sorting).execution_options(yield_per=batch_size)
+
+        result = await session.stream(statement)
+        async for partition in (result.scalars() if is_entity(statement) else result).partitions():
+            for row in partition:
+                yield row
+            # Прочитанные объекты не копятся в identity map сессии
+            session.expunge_all()
+
+    @classmethod
+    async def _page(
+        cls,
+        session: AsyncSession,
+        query: Select,
+        count_query: Select,
+        filters: list,
+        count: Count,
+        concurrently: bool,
+    ) -> tuple[list[TableType], Total]:
+        # Одна сессия = одно соединение, поэтому параллельный подсчет идет через отдельное соединение из пула.
+        # Только для read-сессий: в транзакции второе соединение не увидит ее незакоммиченных изменений.
+        if concurrently and count is not Count.none and session.info.get("readonly"):
+            async with pgconnect() as counter:
+                rows, total = await asyncio.gather(
+                    get_list(session, query),
+                    cls._count(counter, count_query, filters, count),
+                )
+            return rows, total
+
+        total = await cls._count(session, count_query, filters, count)
+        return await get_list(session, query), total
 
     @classmethod
     async def create(cls, session: AsyncSession, model: dict) -> TableType:
-        created_fields = {k: v for k, v in model.items() if getattr(cls.table, k, None) is not None}
+        created_fields = {k: v for k, v in model.items() if k in cls.columns()}
         instance = cls.table(**created_fields)
         session.add(instance)
         await session.flush()
@@ -85,28 +362,139 @@ class CRUD:
 
     @classmethod
     async def update(cls, session: AsyncSession, field: str, value: Any, **kwargs) -> None:
-        updated_fields = {k: v for k, v in kwargs.items() if getattr(cls.table, k, None) is not None}
-        query = update(cls.table).where(getattr(cls.table, field) == value).values(**updated_fields)
+        updated_fields = {k: v for k, v in kwargs.items() if k in cls.columns()}
+        query = update(cls.table).where(cls.column(field) == value).values(**updated_fields)
         await session.execute(query)
         await session.flush()
 
     @classmethod
     async def delete(cls, session: AsyncSession, field: str, value: Any) -> None:
-        query = delete(cls.table).where(getattr(cls.table, field) == value)
+        query = delete(cls.table).where(cls.column(field) == value)
         await session.execute(query)
         await session.flush()
 
+    @classmethod
+    async def create_many(
+        cls,
+        session: AsyncSession,
+        models: list[dict],
+        on_conflict: Optional[list[str]] = None,
+    ) -> list[TableType]:
+        # Один INSERT ... VALUES (...), (...) RETURNING на пачку строк (insertmanyvalues), без flush на каждую строку.
+        # on_conflict - поля уникального ограничения: при конфликте строка обновляется (upsert).
+        # SET ... = EXCLUDED.* берется из колонок строки: строки с разным набором полей идут разными запросами,
+        # иначе поле, не переданное в строке, затерлось бы NULL или значением по умолчанию
+        groups = defaultdict(list)
+        for index, model in enumerate(models):
+            row = {k: v for k, v in model.items() if k in cls.columns()}
+            groups[tuple(sorted(row))].append((index, row))
+
+        created = [None] * len(models)
+        for keys, rows in groups.items():
+            query = insert(cls.table)
+            if on_conflict:
+                # Если обновлять нечего - пустое обновление полями конфликта,
+                # чтобы RETURNING вернул и существующие строки
+                fields = [key for key in keys if key not in on_conflict] or on_conflict
+                query = query.on_conflict_do_update(
+                    index_elements=on_conflict,
+                    set_={field: query.excluded[field] for field in fields},
+                )
+
+            result = await session.scalars(
+                query.returning(cls.table, sort_by_parameter_order=True),
+                [row for _, row in rows],
+                execution_options={"populate_existing": True},
+            )
+            for (index, _), obj in zip(rows, result.all()):
+                created[index] = obj
+
+        return created
+
+    @classmethod
+    async def update_many(cls, session: AsyncSession, field: str, models: list[dict]) -> None:
+        # UPDATE table SET ... FROM (VALUES (...), (...)) AS data WHERE table.field = data.field - один запрос на пачку.
+        # В VALUES у всех строк одинаковые колонки, поэтому строки группируются по набору полей
+        table = cls.table.__table__
+
+        groups = defaultdict(list)
+        for model in models:
+            row = {k: v for k, v in model.items() if k in cls.columns()}
+            groups[tuple(sorted(row))].append(row)
+
+        for keys, rows in groups.items():
+            if len(keys) < 2:  # Кроме field обновлять нечего
+                continue
+
+            for batch in batches(rows, MAX_PARAMETERS // len(keys)):
+                data = values(*[column(key, table.c[key].type) for key in keys], name="data").data(
+                    [tuple(row[key] for key in keys) for row in batch]
+                )
+                query = (
+                    update(table)
+                    .where(table.c[field] == data.c[field])
+                    .values({key: data.c[key] for key in keys if key != field})
+                )
+                await session.execute(query)
+
+        await session.flush()
+
+    @classmethod
+    async def delete_many(cls, session: AsyncSession, field: str, value: list) -> None:
+        await session.execute(delete(cls.table).where(cls._match(field, value)))
+        await session.flush()
+
+
+def batches(items: list, size: int) -> Iterator[list]:
+    for index in range(0, len(items), size):
+        yield items[index : index + size]
+
+
+def is_entity(query: Select) -> bool:
+    # select(Table) - объекты ORM, select(*columns) - строки Row
+    description, *_ = query.column_descriptions
+    return description["expr"] is description["entity"]
+
 
 async def get_list(session: AsyncSession, query: Select) -> list[TableType]:
-    return (await session.execute(query)).scalars().all()  # type:ignore
+    result = await session.execute(query)
+    return (result.scalars() if is_entity(query) else result).all()  # type:ignore
 
 
 async def get_one(session: AsyncSession, query: Select) -> TableType:
     try:
-        return (await session.execute(query)).unique().scalars().one()
+        result = await session.execute(query)
+        return result.unique().scalars().one() if is_entity(query) else result.one()
     except NoResultFound:
         raise ObjectNotFoundError
 
 
 async def get_count(session: AsyncSession, query: Select) -> int:
     return (await session.execute(select(func.count()).select_from(query.subquery()))).scalars().one()
+
+
+async def get_estimated_count(session: AsyncSession, query: Select) -> int:
+    # Оценка планировщика (EXPLAIN) без выполнения запроса. SQL с подставленными значениями уходит драйверу как есть:
+    # text() разобрал бы ":b" внутри строкового литерала как параметр
+    statement = query.compile(dialect=session.bind.dialect, compile_kwargs={"literal_binds": True})
+    connection = await session.connection()
+    plan = (await connection.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {statement}")).scalars().one()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+async def get_leading_columns(session: AsyncSession, table: TableType) -> list[str]:
+    # Первые колонки готовых индексов таблицы; у индекса по выражению indkey[0] = 0 и колонки нет
+    query = text(
+        "SELECT a.attname FROM pg_index i "
+        "JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attnum = i.indkey[0] "
+        "WHERE i.indrelid = CAST(:name AS regclass) AND i.indisvalid"
+    )
+    return list((await session.execute(query, {"name": table.__tablename__})).scalars().all())
+
+
+async def get_reltuples(session: AsyncSession, table: TableType) -> int:
+    # Статистика таблицы из pg_class; -1 - таблица еще не анализировалась
+    query = text("SELECT reltuples::bigint FROM pg_class WHERE oid = CAST(:name AS regclass)")
+    return (await session.execute(query, {"name": table.__tablename__})).scalars().one()
@@ -10,3 +10,5 @@ from .base import get_list
 
 class Dummy(CRUD):
     table = tables.Dummy
+    filterable = {"id"}
+    sortable = {"id"}
@@ -0,0 +1,34 @@
+import time
+
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from sqlalchemy.pool import ConnectionPoolEntry
+
+from src.tools.metrics import Histogram
+
+
+class Pool(AsyncAdaptedQueuePool):
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+
+        self.waiters = 0
+        self.wait_time = Histogram()
+
+    def _do_get(self) -> ConnectionPoolEntry:
+        # Время от запроса соединения до его выдачи: при исчерпании пула - ожидание в очереди
+        self.waiters += 1
+        started_at = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            self.waiters -= 1
+            self.wait_time.observe(time.perf_counter() - started_at)
+
+    def stats(self) -> dict:
+        return dict(
+            size=self.size(),
+            checked_in=self.checkedin(),
+            checked_out=self.checkedout(),
+            overflow=self.overflow(),
+            waiters=self.waiters,
+            wait_time=self.wait_time.to_dict(),
+        )
@@ -1,55 +1,155 @@
+import itertools
 import json
+import time
 from contextlib import asynccontextmanager
+from contextvars import ContextVar
 from functools import partial
+from typing import Optional
 
+from sqlalchemy.ext.asyncio import AsyncEngine
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.ext.asyncio import async_sessionmaker
 from sqlalchemy.ext.asyncio import create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 
 from src.framework import settings
+from src.framework.logger import logger
+from src.framework.settings import Balancer
 from src.tools.utils import DatetimeAwareJSONEncoder
 
+from .pool import Pool
+from .statements import Statements
+from .timing import Timing
+
 custom_serializer = partial(json.dumps, cls=DatetimeAwareJSONEncoder, ensure_ascii=False)
 
+statements = Statements()
+
+timing = Timing()
+
+
+def _create_engine(uri: str) -> AsyncEngine:
+    engine = create_async_engine(
+        uri,
+        echo=False,
+        # echo_pool="debug",
+        future=True,
+        isolation_level="READ COMMITTED",  # Не изменять
+        json_serializer=custom_serializer,
+        poolclass=Pool,
+        pool_size=settings.POSTGRES_POOL_SIZE,
+        max_overflow=settings.POSTGRES_POOL_MAX_OVERFLOW,
+        pool_recycle=settings.POSTGRES_POOL_RECYCLE,
+        pool_pre_ping=settings.POSTGRES_POOL_PRE_PING,
+        pool_timeout=settings.POSTGRES_POOL_TIMEOUT,
+        query_cache_size=settings.POSTGRES_QUERY_CACHE_SIZE,
+        connect_args=dict(prepared_statement_cache_size=settings.POSTGRES_PREPARED_STATEMENT_CACHE_SIZE),
+    )
+    statements.listen(engine)
+    timing.listen(engine)
+    return engine
 
-_engine = create_async_engine(
-    settings.POSTGRES_URI.unicode_string(),
-    echo=False,
-    # echo_pool="debug",
-    future=True,
-    isolation_level="READ COMMITTED",  # Не изменять
-    json_serializer=custom_serializer,
-)
+
+_engine = _create_engine(settings.POSTGRES_URI.unicode_string())
 
 _sessionmaker = async_sessionmaker(_engine, expire_on_commit=False)
 
+# Чтение в AUTOCOMMIT через копию engine с общим пулом: соединение берется из пула только при первом запросе,
+# поэтому сессия, обслуженная из кэша, пул не занимает
+_read_sessionmaker = async_sessionmaker(_engine.execution_options(isolation_level="AUTOCOMMIT"), expire_on_commit=False)
+
+_replicas = [_create_engine(uri.unicode_string()) for uri in settings.POSTGRES_REPLICA_URIS]
+
+_replica_sessionmakers = [
+    async_sessionmaker(engine.execution_options(isolation_level="AUTOCOMMIT"), expire_on_commit=False)
+    for engine in _replicas
+]
+
+_round_robin = itertools.cycle(_replica_sessionmakers)
+
+# Время последнего коммита в текущем запросе - для read-your-writes
+_written_at: ContextVar[Optional[float]] = ContextVar("written_at", default=None)
+
 Table = declarative_base()
 
 
+def pool_stats() -> dict:
+    return dict(primary=_engine.pool.stats(), replicas=[engine.pool.stats() for engine in _replicas])
+
+
+def statement_stats() -> dict:
+    return statements.stats()
+
+
+def pinned() -> bool:
+    # Текущий запрос недавно писал: его чтения идут в primary (read-your-writes)
+    written_at = _written_at.get()
+    return written_at is not None and time.monotonic() - written_at < settings.POSTGRES_READ_YOUR_WRITES_SECONDS
+
+
+def _reader() -> async_sessionmaker:
+    if not _replicas:
+        return _read_sessionmaker
+
+    # Реплика может отставать: сразу после записи читаем из primary
+    if pinned():
+        return _read_sessionmaker
+
+    if settings.POSTGRES_REPLICA_BALANCER is Balancer.least_busy:
+        index = min(range(len(_replicas)), key=lambda i: _replicas[i].pool.checkedout())
+        return _replica_sessionmakers[index]
+
+    return next(_round_robin)
+
+
 @asynccontextmanager
 async def _read() -> AsyncSession:
-    async with _sessionmaker() as session:
-        await session.connection(execution_options={"isolation_level": "AUTOCOMMIT"})
+    async with _reader()() as session:
+        session.info["readonly"] = True
+        yield session
+
+
+@asynccontextmanager
+async def _stream() -> AsyncSession:
+    # Серверные курсоры asyncpg работают только в транзакции: read only, один снимок данных на всю выгрузку
+    async with _reader()() as session:
+        await session.connection(
+            execution_options={"isolation_level": "REPEATABLE READ", "postgresql_readonly": True},
+        )
+        session.info["readonly"] = True
         yield session
 
 
 @asynccontextmanager
 async def _write() -> AsyncSession:
     async with _sessionmaker() as session:
+        # Колбэки после коммита (инвалидация кэша): до коммита параллельное чтение видит старые данные
+        session.info["after_commit"] = []
         try:
             async with session.begin():
                 yield session
+            _written_at.set(time.monotonic())
         except Exception as e:
             await session.rollback()
             raise e
 
+        # Транзакция уже закоммичена: ошибка колбэка (кэш недоступен) не превращает успешную запись в ошибку
+        # и не отменяет остальные колбэки
+        for callback in session.info.pop("after_commit"):
+            try:
+                await callback()
+            except Exception as e:
+                await logger.error(f"After-commit callback failed: {e}", callback=repr(callback))
+
 
 @asynccontextmanager
-async def pgconnect(transaction: bool = False) -> AsyncSession:
+async def pgconnect(transaction: bool = False, stream: bool = False) -> AsyncSession:
     if transaction:
         async with _write() as session:
             yield session
+    elif stream:
+        async with _stream() as session:
+            yield session
     else:
         async with _read() as session:
             yield session
@@ -0,0 +1,27 @@
+from sqlalchemy import event
+from sqlalchemy.engine.interfaces import CacheStats
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+
+class Statements:
+    # Попадания в кэш скомпилированных запросов SQLAlchemy (query_cache_size).
+    # Промах - компиляция SQL и, как правило, новый prepared statement в asyncpg
+    def __init__(self) -> None:
+        self.counts = {stat: 0 for stat in CacheStats}
+
+    def listen(self, engine: AsyncEngine) -> None:
+        event.listen(engine.sync_engine, "before_cursor_execute", self._before_cursor_execute)
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany) -> None:
+        if context is not None:
+            self.counts[context.cache_hit] += 1
+
+    def stats(self) -> dict:
+        hits, misses = self.counts[CacheStats.CACHE_HIT], self.counts[CacheStats.CACHE_MISS]
+        return dict(
+            hits=hits,
+            misses=misses,
+            ratio=hits / (hits + misses) if hits + misses else None,
+            disabled=self.counts[CacheStats.CACHING_DISABLED],
+            no_cache_key=self.counts[CacheStats.NO_CACHE_KEY],  # text() и прочие выражения без ключа кэша
+        )
@@ -0,0 +1,28 @@
+import time
+from functools import partial
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from src.tools import queries
+
+
+class Timing:
+    # Длительность каждого запроса - в статистику текущего HTTP-запроса, медленные - сразу в лог
+    def listen(self, engine: AsyncEngine) -> None:
+        event.listen(engine.sync_engine, "before_cursor_execute", self._before_cursor_execute)
+        event.listen(engine.sync_engine, "after_cursor_execute", self._after_cursor_execute)
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany) -> None:
+        # Время хранится в контексте выполнения: при ошибке он просто отбрасывается
+        if context is not None:
+            context.started_at = time.perf_counter()
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany) -> None:
+        if context is None or not hasattr(context, "started_at"):
+            return
+
+        duration = time.perf_counter() - context.started_at
+        # asyncpg сообщает число строк и для SELECT; серверный курсор и executemany - -1
+        rows = cursor.rowcount if cursor.rowcount >= 0 else None
+        queries.observe("postgres", partial(queries.normalize, statement), duration, rows)
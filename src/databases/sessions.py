@@ -1,3 +1,6 @@
+from typing import Awaitable
+from typing import Callable
+from typing import Optional
 from typing import TypeVar
 from typing import Union
 
@@ -5,3 +8,10 @@ from src.databases import mongo
 from src.databases import postgres
 
 Session = TypeVar("Session", bound=Union[mongo.Session, postgres.Session])
+
+
+def after_commit(session: Session) -> Optional[list[Callable[[], Awaitable[None]]]]:
+    # Колбэки открытой транзакции записи pgconnect/mongoconnect; None - транзакции нет, изменения уже видны
+    if isinstance(session, postgres.Session):
+        return session.info.get("after_commit")
+    return getattr(session, "after_commit", None)
@@ -3,20 +3,52 @@ from typing import Union
 
 from pydantic import BaseModel
 from pydantic import ConfigDict
+from pydantic import TypeAdapter
+from sqlalchemy import Row
 
 from src.databases.postgres.tables import TableType
 
+# Валидатор списка моделей строится один раз на класс
+_ADAPTERS: dict[type, TypeAdapter] = dict()
+
+
+def _data(obj: Union[dict, Row, TableType]) -> dict:
+    if isinstance(obj, dict):
+        return {"id": str(obj.pop("_id")), **obj}
+    elif isinstance(obj, Row):
+        return obj._asdict()
+    # from_attributes=True: все публичные атрибуты - загруженные relationship и extra-поля тоже (extra="allow")
+    return {k: v for k, v in obj.__dict__.items() if not k.startswith("_")}
+
 
 class Model(BaseModel):
     model_config = ConfigDict(from_attributes=True, extra="allow")
 
     @classmethod
-    def orm(cls, obj: Union[dict, TableType]) -> "Model":
-        if isinstance(obj, dict):
-            return cls.model_validate({"id": str(obj.pop("_id")), **obj})
-        else:
-            # from_attributes=True
-            return cls.model_validate({k: v for k, v in obj.__dict__.items() if not k.startswith("_")})
+    def orm(cls, obj: Union[dict, Row, TableType], partial: bool = False) -> "Model":
+        data = _data(obj)
+
+        # partial - выборка с проекцией fields: обязательных полей может не быть, валидация пропускается
+        if partial:
+            return cls.model_construct(**data)
+        return cls.model_validate(data)
+
+    @classmethod
+    def orm_many(
+        cls,
+        objs: list[Union[dict, Row, TableType]],
+        partial: bool = False,
+    ) -> list["Model"]:
+        # Строка разбирается так же, как в orm: результат не зависит от того, какой метод вызван
+        data = [_data(obj) for obj in objs]
+
+        if partial:
+            return [cls.model_construct(**values) for values in data]
+
+        # Один вызов валидатора на всю страницу вместо model_validate на каждую строку
+        if cls not in _ADAPTERS:
+            _ADAPTERS[cls] = TypeAdapter(list[cls])
+        return _ADAPTERS[cls].validate_python(data)
 
     @classmethod
     def init(cls, *args, **kwargs) -> dict:
@@ -0,0 +1,61 @@
+# Сравнение Model.orm и Model.orm_many: python -m src.domain.models.benchmark [count]
+import sys
+import timeit
+from datetime import datetime
+
+from sqlalchemy import BigInteger
+from sqlalchemy import Boolean
+from sqlalchemy import Column
+from sqlalchemy import DateTime
+from sqlalchemy import Float
+from sqlalchemy import String
+from sqlalchemy.engine.result import result_tuple
+from sqlalchemy.orm import declarative_base
+
+from .base import Model
+
+# Отдельная metadata: таблица бенчмарка не попадает в миграции
+Base = declarative_base()
+
+
+class Row(Base):
+    __tablename__ = "benchmark"
+
+    id = Column(BigInteger, primary_key=True)
+    name = Column(String)
+    flag = Column(Boolean)
+    score = Column(Float)
+    created_at = Column(DateTime)
+    updated_at = Column(DateTime)
+
+
+class Item(Model):
+    id: int
+    name: str
+    flag: bool
+    score: float
+    created_at: datetime
+    updated_at: datetime
+
+
+def main(count: int = 10_000, number: int = 10) -> None:
+    now = datetime.utcnow()
+    values = [dict(id=i, name=f"item-{i}", flag=True, score=0.5, created_at=now, updated_at=now) for i in range(count)]
+
+    instances = [Row(**value) for value in values]
+    make_row = result_tuple(list(values[0]))
+    rows = [make_row(tuple(value.values())) for value in values]
+
+    cases = [
+        ("orm", lambda: [Item.orm(instance) for instance in instances]),
+        ("orm_many", lambda: Item.orm_many(instances)),
+        ("orm_many rows", lambda: Item.orm_many(rows)),
+        ("orm_many documents", lambda: Item.orm_many([{"_id": i, **value} for i, value in enumerate(values)])),
+    ]
+    for name, case in cases:
+        elapsed = timeit.timeit(case, number=number)
+        print(f"{name:<20} {count * number / elapsed:>12,.0f} rows/s")
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
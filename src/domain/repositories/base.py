@@ -1,17 +1,29 @@
 from datetime import datetime
+from functools import partial
+from typing import AsyncIterator
+from typing import Optional
 from typing import Union
 
 from bson import ObjectId
+from bson.errors import InvalidId
 
+from src.databases import ObjectNotFoundError
 from src.databases import Session
+from src.databases import after_commit
 from src.databases import mongo
 from src.databases import postgres
+from src.databases.pagination import Total
 from src.domain.models import Model
+from src.tools.cache import Backend
+from src.tools.cache import Cache
+from src.tools.loader import Loader
 
 
 class Repository:
     db: Union[postgres.ORM, mongo.ORM]
     model: Model
+    # Read-through кэш get/get_list_by_ids по id модели; по умолчанию выключен
+    cache: Cache = Cache(Backend())
 
     @classmethod
     def id(cls, model_id: Union[str, int]) -> Union[str, int, ObjectId]:
@@ -22,6 +34,14 @@ class Repository:
         else:
             raise NotImplementedError
 
+    @classmethod
+    def valid(cls, model_id: Union[str, int]) -> bool:
+        try:
+            cls.id(model_id)
+        except (InvalidId, TypeError):
+            return False
+        return True
+
     @classmethod
     def pk(cls) -> str:
         if issubclass(cls.db, postgres.ORM):
@@ -32,18 +52,124 @@ class Repository:
             raise NotImplementedError
 
     @classmethod
-    async def get_list_by_ids(cls, session: Session, model_ids: list[Union[str, int]]) -> list["Repository.model"]:
-        rows = await cls.db.get_list(session, field=cls.pk(), value=[cls.id(model_id) for model_id in model_ids])
-        return [cls.model.orm(row) for row in rows]
+    async def get(
+        cls,
+        session: Session,
+        model_id: Union[str, int],
+        fields: Optional[list[str]] = None,
+    ) -> "Repository.model":
+        # Кэшируются только полные модели; выборка с проекцией всегда идет в базу
+        cached = not fields and cls.cacheable(session)
+        if cached and (value := await cls.cache.get(str(model_id))) is not None:
+            return cls.model.model_validate_json(value)
+
+        row = await cls.db.get(session, field=cls.pk(), value=cls.id(model_id), fields=fields)
+        model = cls.model.orm(row, partial=bool(fields))
+
+        if cached:
+            await cls.cache.set(str(model_id), model.model_dump_json().encode("utf-8"))
+        return model
+
+    @classmethod
+    async def get_list_by_ids(
+        cls,
+        session: Session,
+        model_ids: list[Union[str, int]],
+        fields: Optional[list[str]] = None,
+    ) -> list["Repository.model"]:
+        if fields or not cls.cacheable(session):
+            rows = await cls.db.get_list(
+                session,
+                field=cls.pk(),
+                value=[cls.id(model_id) for model_id in model_ids],
+                fields=fields,
+            )
+            return cls.model.orm_many(rows, partial=bool(fields))
+
+        ids = {str(model_id): model_id for model_id in model_ids}
+
+        models = dict()
+        for key, cached in (await cls.cache.get_many(list(ids))).items():
+            if cached is not None:
+                models[key] = cls.model.model_validate_json(cached)
+
+        # Из базы - только то, чего нет в кэше
+        if missing := [model_id for key, model_id in ids.items() if key not in models]:
+            rows = await cls.db.get_list(session, field=cls.pk(), value=[cls.id(model_id) for model_id in missing])
+            fetched = {str(model.id): model for model in cls.model.orm_many(rows)}
+            await cls.cache.set_many({key: model.model_dump_json().encode("utf-8") for key, model in fetched.items()})
+            models.update(fetched)
+
+        return [models[key] for key in ids if key in models]
+
+    @classmethod
+    def cacheable(cls, session: Session) -> bool:
+        # В транзакции записи кэш не читается и не заполняется: до коммита чтение видит свои незакоммиченные
+        # изменения (после отката они остались бы в кэше на весь TTL), а ключи в кэше еще не инвалидированы
+        return after_commit(session) is None
 
     @classmethod
-    async def get_paginated(cls, session: Session, query: dict) -> tuple[list["Repository.model"], int]:
-        rows, total = await cls.db.get_paginated(session, query=query)
-        return [cls.model.orm(row) for row in rows], total
+    async def invalidate(cls, session: Session, *model_ids: Union[str, int]) -> None:
+        # Ключи удаляются после коммита: если удалить раньше, параллельное чтение между удалением и коммитом
+        # вернет в кэш старую строку на весь TTL
+        keys = [str(model_id) for model_id in model_ids]
+        if (callbacks := after_commit(session)) is not None:
+            callbacks.append(partial(cls.cache.delete, *keys))
+        else:
+            await cls.cache.delete(*keys)
+
+    @classmethod
+    def loader(cls, session: Session) -> Loader:
+        # Загрузчик на один запрос: await loader.load(model_id) из разных мест в одном тике - один get_list_by_ids
+        async def batch(model_ids: list[Union[str, int]]) -> dict:
+            # Невалидный id (не ObjectId для Mongo) не найдется: ObjectNotFoundError получает только его ключ,
+            # а не вся пачка
+            valid = [model_id for model_id in model_ids if cls.valid(model_id)]
+            models = {str(model.id): model for model in await cls.get_list_by_ids(session, valid)} if valid else {}
+            return {model_id: models[str(model_id)] for model_id in model_ids if str(model_id) in models}
+
+        return Loader(batch, error=lambda _: ObjectNotFoundError())
+
+    @classmethod
+    async def get_paginated(
+        cls,
+        session: Session,
+        query: dict,
+        concurrently: bool = False,
+        fields: Optional[list[str]] = None,
+    ) -> tuple[list["Repository.model"], Total, Optional[str]]:
+        rows, total, cursor = await cls.db.get_paginated(
+            session,
+            query=query,
+            concurrently=concurrently,
+            fields=fields,
+        )
+        return cls.model.orm_many(rows, partial=bool(fields)), total, cursor
+
+    @classmethod
+    async def stream(
+        cls,
+        session: Session,
+        query: dict,
+        fields: Optional[list[str]] = None,
+        batch_size: int = 1000,
+    ) -> AsyncIterator["Repository.model"]:
+        # Модели собираются пачками через orm_many, в памяти - не больше batch_size строк
+        rows = []
+        async for row in cls.db.stream(session, query=query, fields=fields, batch_size=batch_size):
+            rows.append(row)
+            if len(rows) >= batch_size:
+                for model in cls.model.orm_many(rows, partial=bool(fields)):
+                    yield model
+                rows = []
+
+        for model in cls.model.orm_many(rows, partial=bool(fields)):
+            yield model
 
     @classmethod
     async def create(cls, session: Session, model: dict) -> "Repository.model":
         row = await cls.db.create(session, model)
+        # Новый id еще не может быть в кэше - инвалидировать нечего
         return cls.model.orm(row)
 
     @classmethod
@@ -55,7 +181,36 @@ class Repository:
             updated_at=datetime.utcnow(),
             **kwargs,
         )
+        await cls.invalidate(session, model_id)
 
     @classmethod
     async def delete(cls, session: Session, model_id: Union[str, int]) -> None:
-        return await cls.db.delete(session, field=cls.pk(), value=cls.id(model_id))
+        await cls.db.delete(session, field=cls.pk(), value=cls.id(model_id))
+        await cls.invalidate(session, model_id)
+
+    @classmethod
+    async def create_many(cls, session: Session, models: list[dict], **kwargs) -> list["Repository.model"]:
+        rows = await cls.db.create_many(session, models, **kwargs)
+        created = cls.model.orm_many(rows)
+        # Upsert (on_conflict) меняет существующие строки; обычная вставка создает только новые id
+        if kwargs.get("on_conflict"):
+            await cls.invalidate(session, *[model.id for model in created])
+        return created
+
+    @classmethod
+    async def update_many(cls, session: Session, models: dict[Union[str, int], dict]) -> None:
+        # {model_id: {field: value}} - у каждой модели свой набор изменений
+        updated_at = datetime.utcnow()
+        await cls.db.update_many(
+            session=session,
+            field=cls.pk(),
+            models=[
+                {**kwargs, "updated_at": updated_at, cls.pk(): cls.id(model_id)} for model_id, kwargs in models.items()
+            ],
+        )
+        await cls.invalidate(session, *models)
+
+    @classmethod
+    async def delete_many(cls, session: Session, model_ids: list[Union[str, int]]) -> None:
+        await cls.db.delete_many(session, field=cls.pk(), value=[cls.id(model_id) for model_id in model_ids])
+        await cls.invalidate(session, *model_ids)
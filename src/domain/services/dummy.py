@@ -1,27 +1,51 @@
+from typing import AsyncIterator
+
+from src.databases import postgres
 from src.databases.mongo import mongoconnect
 from src.databases.postgres import pgconnect
 from src.domain import models
 from src.domain import repositories
+from src.tools.singleflight import singleflight
 
 
 class Dummy:
     @classmethod
+    @singleflight(bypass=postgres.pinned)
     async def get(cls, dummy_id: int) -> models.Dummy:
         async with pgconnect() as session:
             return await repositories.Dummy.get(session, model_id=dummy_id)
 
+    @classmethod
+    async def get_many(cls, dummy_ids: list[int]) -> list[models.Dummy]:
+        # Один запрос IN (...) на все id; ObjectNotFoundError, если какого-то нет
+        async with pgconnect() as session:
+            return await repositories.Dummy.loader(session).load_many(dummy_ids)
+
     @classmethod
     async def create(cls) -> models.Dummy:
         async with pgconnect(transaction=True) as session:
             return await repositories.Dummy.create(session, model=models.Dummy.init())
 
+    @classmethod
+    async def export(cls, query: dict) -> AsyncIterator[models.Dummy]:
+        # Сессия открыта, пока ответ отдается клиенту
+        async with pgconnect(stream=True) as session:
+            async for dummy in repositories.Dummy.stream(session, query=query):
+                yield dummy
+
 
 class DummyDocument:
     @classmethod
+    @singleflight
     async def get(cls, dummy_id: str) -> models.Dummy:
         async with mongoconnect() as session:
             return await repositories.DummyDocument.get(session, model_id=dummy_id)
 
+    @classmethod
+    async def get_many(cls, dummy_ids: list[str]) -> list[models.DummyDocument]:
+        async with mongoconnect() as session:
+            return await repositories.DummyDocument.loader(session).load_many(dummy_ids)
+
     @classmethod
     async def create(cls) -> models.Dummy:
         async with mongoconnect(transaction=True) as session:
@@ -0,0 +1,82 @@
+# Пропускная способность слоя ответа (без базы): response_model + JSONResponse против Schema.response()
+# python -m src.endpoints.http.benchmark [count] [items]
+import asyncio
+import sys
+import time
+
+from fastapi import FastAPI
+from fastapi import Response
+from fastapi.responses import JSONResponse
+
+from src.tools.fastapi.responses import FastJSONResponse
+
+from .schemas import Schema
+
+
+class Item(Schema):
+    id: int
+    name: str
+    tags: list[str]
+
+
+class Items(Schema):
+    items: list[Item]
+
+
+def _app(items: Items, fast: bool) -> FastAPI:
+    app = FastAPI(default_response_class=FastJSONResponse if fast else JSONResponse)
+
+    if fast:
+
+        @app.get("/items", response_model=Items)
+        async def get_items() -> Response:
+            return items.response()
+
+    else:
+
+        @app.get("/items", response_model=Items)
+        async def get_items() -> Items:
+            return items
+
+    return app
+
+
+async def _request(app: FastAPI) -> None:
+    scope = {
+        "type": "http",
+        "http_version": "1.1",
+        "method": "GET",
+        "path": "/items",
+        "raw_path": b"/items",
+        "root_path": "",
+        "scheme": "http",
+        "query_string": b"",
+        "headers": [],
+        "client": ("127.0.0.1", 0),
+        "server": ("127.0.0.1", 8000),
+    }
+
+    async def receive() -> dict:
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message: dict) -> None:
+        pass
+
+    await app(scope, receive, send)
+
+
+async def main(count: int = 5000, size: int = 50) -> None:
+    items = Items(items=[Item(id=i, name=f"item-{i}", tags=["a", "b", "c"]) for i in range(size)])
+
+    for name, fast in [("response_model", False), ("Schema.response", True)]:
+        app = _app(items, fast)
+        await _request(app)
+
+        started_at = time.perf_counter()
+        for _ in range(count):
+            await _request(app)
+        print(f"{name:<16} {count / (time.perf_counter() - started_at):>10,.0f} requests/s")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(*[int(arg) for arg in sys.argv[1:]]))
@@ -0,0 +1,82 @@
+import csv
+import io
+import json
+from enum import Enum
+from typing import AsyncIterator
+from typing import Callable
+
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+
+from src.domain import models
+
+# Сколько байт копится перед отправкой клиенту: меньше сообщений ASGI, память - постоянная
+CHUNK_SIZE = 64 * 1024
+
+
+class Format(str, Enum):
+    ndjson = "ndjson"
+    csv = "csv"
+
+    @property
+    def media_type(self) -> str:
+        if self is self.ndjson:
+            return "application/x-ndjson"
+        elif self is self.csv:
+            return "text/csv"
+        else:
+            raise NotImplementedError
+
+
+async def _ndjson(items: AsyncIterator[BaseModel]) -> AsyncIterator[str]:
+    async for item in items:
+        yield item.model_dump_json() + "\n"
+
+
+async def _csv(items: AsyncIterator[BaseModel], schema: type[BaseModel]) -> AsyncIterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    writer.writerow(list(schema.model_fields))
+    async for item in items:
+        # Вложенные значения - JSON-строкой в ячейке
+        row = [
+            json.dumps(value) if isinstance(value, (dict, list)) else value
+            for value in item.model_dump(mode="json").values()
+        ]
+        writer.writerow(row)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+
+async def _chunks(lines: AsyncIterator[str]) -> AsyncIterator[bytes]:
+    chunk = bytearray()
+    async for line in lines:
+        chunk += line.encode("utf-8")
+        if len(chunk) >= CHUNK_SIZE:
+            yield bytes(chunk)
+            chunk.clear()
+    if chunk:
+        yield bytes(chunk)
+
+
+def export(
+    items: AsyncIterator[models.Model],
+    schema: type[BaseModel],
+    serialize: Callable[[models.Model], BaseModel],
+    export_format: Format,
+    filename: str,
+) -> StreamingResponse:
+    # Выгрузка в NDJSON/CSV потоком: строки идут из курсора базы клиенту без накопления всего результата
+    async def _items() -> AsyncIterator[BaseModel]:
+        async for item in items:
+            yield serialize(item)
+
+    lines = _ndjson(_items()) if export_format is Format.ndjson else _csv(_items(), schema)
+
+    return StreamingResponse(
+        _chunks(lines),
+        media_type=export_format.media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{export_format.value}"'},
+    )
@@ -1,15 +1,33 @@
+from typing import Annotated
 from typing import Any
+from typing import Optional
 from typing import Self
 from typing import Union
 
 from pydantic import BaseModel
+from pydantic import Discriminator
+from pydantic import Tag
 from pydantic import conint
 from pydantic import conlist
+from pydantic import model_validator
 
+from src.databases.filters import Operator
+from src.databases.filters import expected
+from src.databases.filters import valid_value
+from src.databases.pagination import Count
+from src.databases.pagination import Total
 from src.domain import models
+from src.tools.fastapi.responses import FastJSONResponse
 
 
-class Created(BaseModel):
+class Schema(BaseModel):
+    def response(self, status_code: int = 200) -> FastJSONResponse:
+        # Схема уже провалидирована в serialize: JSON собирает сериализатор pydantic,
+        # а возврат Response из роута пропускает повторную валидацию по response_model
+        return FastJSONResponse(self.model_dump_json().encode("utf-8"), status_code=status_code)
+
+
+class Created(Schema):
     id: Union[int, str]
 
     @classmethod
@@ -23,10 +41,23 @@ class Update(BaseModel):
         return self.dict(exclude_defaults=True)
 
 
+def _pagination_type(value: Any) -> str:
+    fields = value if isinstance(value, dict) else vars(value)
+    return "cursor" if "cursor" in fields else "offset"
+
+
 class Search(BaseModel):
     class Filter(BaseModel):
         field: str
-        value: Union[int, str, list]
+        operator: Operator = Operator.eq
+        value: Union[bool, int, str, list, None] = None
+
+        @model_validator(mode="after")
+        def check_value(self) -> Self:
+            # Иначе значение неверного типа дойдет до CRUD и вернет 500 вместо 422
+            if not valid_value(self.operator, self.value):
+                raise ValueError(f"Operator '{self.operator.value}' expects {expected(self.operator)}")
+            return self
 
     class Sorting(BaseModel):
         field: str
@@ -40,9 +71,22 @@ class Search(BaseModel):
         def deserialize(self) -> dict:
             return dict(limit=self.size, offset=(self.page - 1) * self.size if self.page > 0 else 0)
 
+    class Cursor(BaseModel):
+        # Keyset-пагинация: cursor=None - первая страница, далее значение Paginated.cursor
+        cursor: Optional[str] = None
+        size: conint(gt=0, le=100) = 10
+
+        @property
+        def deserialize(self) -> dict:
+            return dict(limit=self.size, cursor=self.cursor)
+
     filters: conlist(Filter) = []
     sorting: conlist(Sorting) = []
-    pagination: Pagination = Pagination()
+    count: Count = Count.exact
+    pagination: Annotated[
+        Union[Annotated[Pagination, Tag("offset")], Annotated[Cursor, Tag("cursor")]],
+        Discriminator(_pagination_type),
+    ] = Pagination()
 
     @property
     def deserialize(self) -> dict:
@@ -50,9 +94,20 @@ class Search(BaseModel):
             filters=[dict(item) for item in self.filters],
             sorting=[dict(item) for item in self.sorting],
             pagination=self.pagination.deserialize,
+            count=self.count,
         )
 
 
-class Paginated(BaseModel):
-    total: int
+class Paginated(Schema):
+    class Total(BaseModel):
+        # kind: exact - точное значение, estimated - оценка, capped - "не меньше value", none - не считался
+        value: Optional[int]
+        kind: Count
+
+        @classmethod
+        def serialize(cls, total: Total) -> Self:
+            return cls(value=total.value, kind=total.kind)
+
+    total: Total
     items: list[Any]
+    cursor: Optional[str] = None
@@ -1,10 +1,17 @@
 from fastapi import APIRouter
 from fastapi import Path
+from fastapi import Query
+from fastapi import Response
 from fastapi import status
+from fastapi.responses import StreamingResponse
 
 from src.domain import services
+from src.endpoints.http.export import Format
+from src.endpoints.http.export import export
 
+from .schemas import GetDummyDocumentListResponse
 from .schemas import GetDummyDocumentResponse
+from .schemas import GetDummyListResponse
 from .schemas import GetDummyResponse
 from .schemas import PostDummyDocumentResponse
 from .schemas import PostDummyResponse
@@ -17,9 +24,34 @@ router = APIRouter()
     status_code=status.HTTP_201_CREATED,
     response_model=PostDummyResponse,
 )
-async def dummy_create() -> PostDummyResponse:
+async def dummy_create() -> Response:
     dummy = await services.Dummy.create()
-    return PostDummyResponse.serialize(dummy)
+    return PostDummyResponse.serialize(dummy).response(status.HTTP_201_CREATED)
+
+
+@router.get(
+    "/dummy",
+    status_code=status.HTTP_200_OK,
+    response_model=GetDummyListResponse,
+)
+async def dummy_get_many(dummy_ids: list[int] = Query(..., alias="id", min_length=1, max_length=100)) -> Response:
+    dummies = await services.Dummy.get_many(dummy_ids)
+    return GetDummyListResponse.serialize(dummies).response()
+
+
+@router.get(
+    "/dummy/export",
+    status_code=status.HTTP_200_OK,
+    response_class=StreamingResponse,
+)
+async def dummy_export(export_format: Format = Query(Format.ndjson, alias="format")) -> StreamingResponse:
+    return export(
+        services.Dummy.export(query=dict(sorting=[dict(field="id", type="asc")])),
+        schema=GetDummyResponse,
+        serialize=GetDummyResponse.serialize,
+        export_format=export_format,
+        filename="dummy",
+    )
 
 
 @router.get(
@@ -27,9 +59,9 @@ async def dummy_create() -> PostDummyResponse:
     status_code=status.HTTP_200_OK,
     response_model=GetDummyResponse,
 )
-async def dummy_get(dummy_id: int = Path(..., alias="id")) -> GetDummyResponse:
+async def dummy_get(dummy_id: int = Path(..., alias="id")) -> Response:
     dummy = await services.Dummy.get(dummy_id)
-    return GetDummyResponse.serialize(dummy)
+    return GetDummyResponse.serialize(dummy).response()
 
 
 @router.post(
@@ -37,9 +69,21 @@ async def dummy_get(dummy_id: int = Path(..., alias="id")) -> GetDummyResponse:
     status_code=status.HTTP_201_CREATED,
     response_model=PostDummyDocumentResponse,
 )
-async def dummy_document_create() -> PostDummyDocumentResponse:
+async def dummy_document_create() -> Response:
     dummy = await services.DummyDocument.create()
-    return PostDummyDocumentResponse.serialize(dummy)
+    return PostDummyDocumentResponse.serialize(dummy).response(status.HTTP_201_CREATED)
+
+
+@router.get(
+    "/dummy-document",
+    status_code=status.HTTP_200_OK,
+    response_model=GetDummyDocumentListResponse,
+)
+async def dummy_document_get_many(
+    dummy_ids: list[str] = Query(..., alias="id", min_length=1, max_length=100),
+) -> Response:
+    dummies = await services.DummyDocument.get_many(dummy_ids)
+    return GetDummyDocumentListResponse.serialize(dummies).response()
 
 
 @router.get(
@@ -47,6 +91,6 @@ async def dummy_document_create() -> PostDummyDocumentResponse:
     status_code=status.HTTP_200_OK,
     response_model=GetDummyDocumentResponse,
 )
-async def dummy_document_get(dummy_id: str = Path(..., alias="id")) -> GetDummyDocumentResponse:
+async def dummy_document_get(dummy_id: str = Path(..., alias="id")) -> Response:
     dummy = await services.DummyDocument.get(dummy_id)
-    return GetDummyDocumentResponse.serialize(dummy)
+    return GetDummyDocumentResponse.serialize(dummy).response()
@@ -1,12 +1,11 @@
 from typing import Self
 
-from pydantic import BaseModel
-
 from src.domain import models
 from src.endpoints.http.schemas import Created
+from src.endpoints.http.schemas import Schema
 
 
-class GetDummyResponse(BaseModel):
+class GetDummyResponse(Schema):
     id: int
 
     @classmethod
@@ -14,11 +13,19 @@ class GetDummyResponse(BaseModel):
         return cls(id=item.id)
 
 
+class GetDummyListResponse(Schema):
+    items: list[GetDummyResponse]
+
+    @classmethod
+    def serialize(cls, items: list[models.Dummy]) -> Self:
+        return cls(items=[GetDummyResponse.serialize(item) for item in items])
+
+
 class PostDummyResponse(Created):
     id: int
 
 
-class GetDummyDocumentResponse(BaseModel):
+class GetDummyDocumentResponse(Schema):
     id: str
 
     @classmethod
@@ -26,5 +33,13 @@ class GetDummyDocumentResponse(BaseModel):
         return cls(id=item.id)
 
 
+class GetDummyDocumentListResponse(Schema):
+    items: list[GetDummyDocumentResponse]
+
+    @classmethod
+    def serialize(cls, items: list[models.DummyDocument]) -> Self:
+        return cls(items=[GetDummyDocumentResponse.serialize(item) for item in items])
+
+
 class PostDummyDocumentResponse(Created):
     id: str
@@ -8,13 +8,21 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.openapi.docs import get_redoc_html
 from fastapi.openapi.docs import get_swagger_ui_html
 from fastapi.openapi.utils import get_openapi
-from fastapi.responses import JSONResponse
 from fastapi.staticfiles import StaticFiles
 
+from src.databases import mongo
+from src.databases import postgres
+from src.databases.indexes import unbuilt
+from src.databases.indexes import unindexed
 from src.endpoints.http import router
+from src.storages.cache import cache
+from src.storages.s3 import s3
+from src.tools.asynclogger import shutdown as shutdown_logger
 from src.tools.exceptions import Error
 from src.tools.fastapi.middleware.http import EXCLUDE_PATHS
 from src.tools.fastapi.middleware.http import HTTPMiddleware
+from src.tools.fastapi.responses import FastJSONResponse
+from src.tools.queries import slow_log
 
 from .i18n import I18Error
 from .i18n import Locale
@@ -24,12 +32,36 @@ from .settings import settings
 
 @asynccontextmanager
 async def lifespan(_: FastAPI):
+    slow_log.start(logger, settings.LOGGER_SLOW_QUERY_SECONDS)
+    await s3.open()
+    await cache.open()
+    await check_indexes()
     yield
-    # await Cache.delete_namespace()
+    await cache.close()
+    await s3.close()
+    slow_log.stop()
+    await shutdown_logger()
+
+
+async def check_indexes() -> None:
+    try:
+        fields, indexes = await unindexed(), await unbuilt()
+    except Exception as e:
+        await logger.warning(f"Index check failed: {e}")
+        return
+
+    for name, missing in fields.items():
+        await logger.warning(f"Filterable/sortable fields without index: {name}", fields=missing)
+
+    for name, missing in indexes.items():
+        await logger.warning(
+            f"Declared indexes are not built, run `python cli.py indexes --build`: {name}", indexes=missing
+        )
 
 
 app = FastAPI(
     lifespan=lifespan,
+    default_response_class=FastJSONResponse,
     docs_url=None,
     redoc_url=None,
 )
@@ -53,6 +85,16 @@ async def openapi():
     return get_openapi(title=app.title, version=app.version, routes=app.routes)
 
 
+@app.get(f"{settings.SERVER_API_PATH}/-/pools", include_in_schema=False)
+async def pools():
+    return dict(postgres=postgres.pool_stats(), mongo=mongo.pool_stats())
+
+
+@app.get(f"{settings.SERVER_API_PATH}/-/statements", include_in_schema=False)
+async def statements():
+    return dict(postgres=postgres.statement_stats())
+
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -65,6 +107,8 @@ app.add_middleware(
     HTTPMiddleware,
     exclude_paths=EXCLUDE_PATHS,
     logger=logger,
+    max_body_size=settings.LOGGER_HTTP_BODY_SIZE,
+    sampling=settings.LOGGER_HTTP_SAMPLING,
 )
 
 app.include_router(router)
@@ -73,7 +117,7 @@ app.mount(f"{settings.SERVER_API_PATH}/static", StaticFiles(directory="src/stati
 
 
 @app.exception_handler(I18Error)
-async def i18error_handler(request: Request, error: I18Error) -> JSONResponse:
+async def i18error_handler(request: Request, error: I18Error) -> FastJSONResponse:
     locale = Locale(request.headers.get("locale"))
 
     await logger.error(
@@ -81,15 +125,15 @@ async def i18error_handler(request: Request, error: I18Error) -> JSONResponse:
         status_code=error.status_code,
         content=error.to_dict(locale),
     )
-    return JSONResponse(status_code=error.status_code, content=error.to_dict(locale))
+    return FastJSONResponse(status_code=error.status_code, content=error.to_dict(locale))
 
 
 @app.exception_handler(Error)
-async def error_handler(_: Request, error: Error) -> JSONResponse:
+async def error_handler(_: Request, error: Error) -> FastJSONResponse:
     await logger.error(
         error.description,
         status_code=error.status_code,
         content=error.to_dict(),
     )
 
-    return JSONResponse(status_code=error.status_code, content=error.to_dict())
+    return FastJSONResponse(status_code=error.status_code, content=error.to_dict())
@@ -1,11 +1,26 @@
 from src.tools.asynclogger import Field
 from src.tools.asynclogger import add_handler
 from src.tools.asynclogger import console_handler
+from src.tools.asynclogger import console_log
 from src.tools.asynclogger import get_logger
+from src.tools.asynclogger import json_handler
+from src.tools.asynclogger import json_log
+from src.tools.asynclogger import queue_handler
 
 from .settings import settings
 
-if settings.LOGGER_CONSOLE:
+if settings.LOGGER_CONSOLE and settings.LOGGER_QUEUE:
+    add_handler(
+        queue_handler(
+            level=settings.LOGGER_CONSOLE_LEVEL,
+            max_size=settings.LOGGER_QUEUE_SIZE,
+            policy=settings.LOGGER_QUEUE_POLICY,
+            make_log=json_log if settings.LOGGER_JSON else console_log,
+        )
+    )
+elif settings.LOGGER_CONSOLE and settings.LOGGER_JSON:
+    add_handler(json_handler(level=settings.LOGGER_CONSOLE_LEVEL))
+elif settings.LOGGER_CONSOLE:
     add_handler(console_handler(level=settings.LOGGER_CONSOLE_LEVEL))
 
 
@@ -14,6 +14,11 @@ class Env(str, Enum):
     production = "production"
 
 
+class Balancer(str, Enum):
+    round_robin = "round_robin"
+    least_busy = "least_busy"
+
+
 class AsyncPostgresDsn(PostgresDsn):
     allowed_schemes = {"postgresql+asyncpg"}
 
@@ -41,6 +46,42 @@ class PostgresSettings(BaseSettings):
             path=info.data["POSTGRES_DB"],
         )
 
+    # Реплики для чтения pgconnect(transaction=False): ["host:port", ...]
+    POSTGRES_REPLICA_HOSTS: list[str] = []
+    POSTGRES_REPLICA_URIS: list[AsyncPostgresDsn] = []
+    POSTGRES_REPLICA_BALANCER: Balancer = Balancer.round_robin
+    # Read-your-writes: столько секунд после коммита чтения в том же запросе идут в primary (0 - выключено)
+    POSTGRES_READ_YOUR_WRITES_SECONDS: float = 0
+
+    # Пул соединений (на каждый engine: primary и каждую реплику)
+    POSTGRES_POOL_SIZE: int = 5
+    POSTGRES_POOL_MAX_OVERFLOW: int = 10
+    POSTGRES_POOL_RECYCLE: int = -1  # Секунды, -1 - не пересоздавать соединения
+    POSTGRES_POOL_PRE_PING: bool = False
+    POSTGRES_POOL_TIMEOUT: float = 30  # Ожидание свободного соединения, секунды
+
+    POSTGRES_QUERY_CACHE_SIZE: int = 500  # Скомпилированные запросы SQLAlchemy, на engine
+    POSTGRES_PREPARED_STATEMENT_CACHE_SIZE: int = 100  # Prepared statements asyncpg, на соединение (0 - выключено)
+
+    @field_validator("POSTGRES_REPLICA_URIS", mode="after")
+    def assemble_postgres_replica_connections(cls, v: list, info: FieldValidationInfo) -> Any:
+        if v:
+            return v
+        replicas = []
+        for replica in info.data["POSTGRES_REPLICA_HOSTS"]:
+            host, _, port = replica.partition(":")
+            replicas.append(
+                AsyncPostgresDsn.build(
+                    scheme="postgresql+asyncpg",
+                    username=info.data["POSTGRES_USER"],
+                    password=info.data["POSTGRES_PASSWORD"],
+                    host=host,
+                    port=int(port) if port else info.data["POSTGRES_PORT"],
+                    path=info.data["POSTGRES_DB"],
+                )
+            )
+        return replicas
+
 
 class MongoSettings(BaseSettings):
     MONGO_USER: str
@@ -64,10 +105,24 @@ class MongoSettings(BaseSettings):
             db=info.data["MONGO_DB"],
         )
 
+    # Пул соединений (на каждый сервер)
+    MONGO_MAX_POOL_SIZE: int = 100
+    MONGO_MIN_POOL_SIZE: int = 0
+    MONGO_MAX_IDLE_TIME_MS: Optional[int] = None
+    MONGO_WAIT_QUEUE_TIMEOUT_MS: Optional[int] = None  # Ожидание свободного соединения
+
 
 class LoggerSetting(BaseSettings):
     LOGGER_CONSOLE: bool
     LOGGER_CONSOLE_LEVEL: str
+    LOGGER_JSON: bool = False  # JSON Lines вместо цветного вывода
+    # Очередь: форматирование и вывод в фоновом потоке пачками
+    LOGGER_QUEUE: bool = False
+    LOGGER_QUEUE_SIZE: int = 10000
+    LOGGER_QUEUE_POLICY: str = "drop"  # drop | block - поведение при переполнении очереди
+    LOGGER_HTTP_BODY_SIZE: int = 4096  # Сколько байт тела запроса/ответа пишется в лог HTTPMiddleware
+    LOGGER_HTTP_SAMPLING: dict[str, int] = {}  # {"regex пути": N} - логировать каждый N-й запрос каждого маршрута
+    LOGGER_SLOW_QUERY_SECONDS: Optional[float] = 0.5  # Порог медленного запроса к БД; None - не логировать
 
 
 class S3Settings(BaseSettings):
@@ -75,6 +130,21 @@ class S3Settings(BaseSettings):
     S3_ACCESS_KEY_ID: str
     S3_SECRET_KEY: str
     S3_BUCKET: str
+    S3_MAX_POOL_CONNECTIONS: int = 10
+    S3_KEEPALIVE_TIMEOUT: float = 12  # Секунды простоя, после которых соединение закрывается
+    S3_MAX_ATTEMPTS: int = 3
+    S3_RETRY_MODE: str = "standard"  # legacy | standard | adaptive
+
+
+class CacheSettings(BaseSettings):
+    # none | memory | redis. memory - кэш внутри процесса: запись в одном воркере не инвалидирует остальные,
+    # поэтому только для одного воркера; общий кэш для нескольких воркеров - redis
+    CACHE_BACKEND: str = "none"
+    CACHE_URL: Optional[str] = None  # redis://[[username]:password@]host[:port][/db]
+    CACHE_TTL: int = 60  # Секунды
+    CACHE_MAX_SIZE: int = 10000  # Ключей на процесс для memory
+    CACHE_POOL_SIZE: int = 10  # Соединений для redis
+    CACHE_TIMEOUT: float = 1  # Секунды на команду для redis
 
 
 class JWTSettings(BaseSettings):
@@ -90,6 +160,7 @@ configs = [
     MongoSettings,
     LoggerSetting,
     S3Settings,
+    CacheSettings,
     JWTSettings,
 ]
 
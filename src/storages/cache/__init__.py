@@ -0,0 +1 @@
+from .setup import cache
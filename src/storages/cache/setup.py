@@ -0,0 +1,14 @@
+from src.framework import settings
+from src.tools.cache import Backend
+from src.tools.cache import Cache
+from src.tools.cache import MemoryBackend
+from src.tools.cache import RedisBackend
+
+if settings.CACHE_BACKEND == "redis":
+    backend = RedisBackend(settings.CACHE_URL, pool_size=settings.CACHE_POOL_SIZE, timeout=settings.CACHE_TIMEOUT)
+elif settings.CACHE_BACKEND == "memory":
+    backend = MemoryBackend(max_size=settings.CACHE_MAX_SIZE)
+else:
+    backend = Backend()
+
+cache = Cache(backend, ttl=settings.CACHE_TTL, prefix=f"{settings.SERVER_NAME}:")
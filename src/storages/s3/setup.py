@@ -6,4 +6,8 @@ s3 = S3(
     endpoint_url=settings.S3_URL,
     aws_access_key_id=settings.S3_ACCESS_KEY_ID,
     aws_secret_access_key=settings.S3_SECRET_KEY,
+    max_pool_connections=settings.S3_MAX_POOL_CONNECTIONS,
+    keepalive_timeout=settings.S3_KEEPALIVE_TIMEOUT,
+    max_attempts=settings.S3_MAX_ATTEMPTS,
+    retry_mode=settings.S3_RETRY_MODE,
 )
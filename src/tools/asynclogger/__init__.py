@@ -1,4 +1,9 @@
 from .fields import Field
+from .handlers import console_log
+from .handlers import json_log
 from .logger import add_handler
 from .logger import console_handler
 from .logger import get_logger
+from .logger import json_handler
+from .logger import queue_handler
+from .logger import shutdown
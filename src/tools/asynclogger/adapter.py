@@ -1,4 +1,3 @@
-from copy import deepcopy
 from datetime import datetime
 from typing import Any
 from typing import Optional
@@ -23,7 +22,7 @@ class BoundLoggerAdapter(BoundLogger):
         positional_args = list()
 
         if args:
-            for arg in deepcopy(args):
+            for arg in args:
                 if isinstance(arg, dict):
                     for key, value in arg.items():
                         kwargs[key] = value
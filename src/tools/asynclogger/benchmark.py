@@ -0,0 +1,46 @@
+# Сравнение скорости форматирования записей: python -m src.tools.asynclogger.benchmark [count]
+import logging
+import sys
+import timeit
+from datetime import datetime
+
+from aiologger.records import LogRecord
+
+from .handlers import console_log
+from .handlers import json_log
+
+
+def _record() -> LogRecord:
+    msg = {
+        "timestamp": datetime.utcnow().isoformat(),
+        "level_name": "INFO",
+        "event": "HTTP Response: GET http://127.0.0.1:8000/v1/dummy/1",
+        "facility": "FastAPI",
+        "environment": "develop",
+        "method": "GET",
+        "url": "http://127.0.0.1:8000/v1/dummy/1",
+        "headers": {"host": "127.0.0.1:8000", "accept": "application/json", "user-agent": "benchmark"},
+        "query": {},
+        "code": 200,
+        "response": '{"id":1}' * 64,
+    }
+    return LogRecord(
+        name="benchmark",
+        level=logging.INFO,
+        pathname=__file__,
+        lineno=0,
+        msg=msg,
+        args=None,
+        exc_info=None,
+    )
+
+
+def main(count: int = 100_000) -> None:
+    record = _record()
+    for name, make_log in [("console", console_log), ("json", json_log)]:
+        elapsed = timeit.timeit(lambda: make_log(record), number=count)
+        print(f"{name:<8} {count / elapsed:>12,.0f} records/s")
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
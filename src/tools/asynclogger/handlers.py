@@ -1,14 +1,27 @@
-from copy import deepcopy
+import asyncio
+import queue
+import sys
+import threading
+from copy import copy
+from enum import Enum
+from typing import Any
+from typing import Callable
 from typing import Optional
+from typing import TextIO
 
+import orjson
 from aiologger.handlers.base import Handler
 from aiologger.handlers.streams import AsyncStreamHandler as _AsyncStreamHandler
 from aiologger.records import LogRecord
 
 from .fields import FIELDS_SETTINGS
+from .fields import Field
 
 MAX_LENGTH_FIELD = 27648
 
+# Порядок ключей JSON-лога: сначала служебные, затем контекст в порядке передачи
+JSON_FIELDS_ORDER = (Field.timestamp.value, Field.level_name.value, Field.event.value)
+
 
 class MockHandler(Handler):
     def initialized(self):
@@ -21,34 +34,151 @@ class MockHandler(Handler):
         pass
 
 
-class ConsoleHandler(_AsyncStreamHandler):
-    fields: Optional[list[str]] = None
+def console_log(record: LogRecord, fields: Optional[list[str]] = None) -> str:
+    context: dict = record.msg
 
-    def __init__(self, fields: Optional[list[str]] = None, *args, **kwargs):
-        super().__init__(*args, **kwargs)
+    if fields:  # Урезаем контекст если передан список ключей
+        context = {k: v for k, v in context.items() if k in fields}
 
-        self.fields = fields
+    items = list()
 
-    def make_log(self, copy: LogRecord) -> str:
-        context: dict = copy.msg
+    for key, value in context.items():
+        settings = FIELDS_SETTINGS.get(key, FIELDS_SETTINGS["kwarg"])  # Получаем настройки по каждому ключу
 
-        if self.fields:  # Урезаем контекст если передан список ключей
-            context = {k: v for k, v in context.items() if k in self.fields}
+        items.append(dict(priority=settings["priority"], string=settings["template"](record.levelname, key, value)))
 
-        fields = list()
+    items.sort(key=lambda item: item["priority"])  # Сортируем объекты по приоритету
 
-        for key, value in context.items():
-            settings = FIELDS_SETTINGS.get(key, FIELDS_SETTINGS["kwarg"])  # Получаем настройки по каждому ключу
+    return "\u0020".join(item["string"] for item in items)  # Формируем строку
 
-            fields.append(dict(priority=settings["priority"], string=settings["template"](copy.levelname, key, value)))
 
-        fields.sort(key=lambda item: item["priority"])  # Сортируем объекты по приоритету
+def _truncate(value: Any) -> Any:
+    # Копируется только префикс длиной MAX_LENGTH_FIELD, а не вся строка
+    if isinstance(value, str) and len(value) > MAX_LENGTH_FIELD:
+        return value[:MAX_LENGTH_FIELD]
+    elif isinstance(value, (bytes, bytearray)):
+        return bytes(memoryview(value)[:MAX_LENGTH_FIELD]).decode("utf-8", errors="replace")
+    return value
 
-        return "\u0020".join(item["string"] for item in fields)  # Формируем строку
 
-    async def handle(self, record: LogRecord) -> bool:
-        copy = deepcopy(record)
+def _default(obj: Any) -> str:
+    # orjson сам сериализует datetime, date, enum и uuid; Decimal и прочее - строкой, как DatetimeAwareJSONEncoder
+    return str(obj)
+
+
+def _dumps(payload: dict) -> str:
+    return orjson.dumps(payload, default=_default, option=orjson.OPT_NON_STR_KEYS).decode("utf-8")
+
+
+def json_log(record: LogRecord, fields: Optional[list[str]] = None) -> str:
+    context: dict = record.msg
+
+    payload = {key: context[key] for key in JSON_FIELDS_ORDER if key in context}
+
+    for key, value in context.items():
+        if key not in payload and (not fields or key in fields):
+            payload[key] = _truncate(value)
 
-        copy.msg = self.make_log(copy)
+    return _dumps(payload)
 
-        return await super().handle(copy)
+
+class ConsoleHandler(_AsyncStreamHandler):
+    fields: Optional[list[str]] = None
+
+    def __init__(self, fields: Optional[list[str]] = None, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        self.fields = fields
+
+    def make_log(self, record: LogRecord) -> str:
+        return console_log(record, self.fields)
+
+    async def handle(self, record: LogRecord) -> bool:
+        # Поверхностная копия: msg заменяется, а не изменяется, исходная запись остается нетронутой
+        formatted = copy(record)
+
+        formatted.msg = self.make_log(formatted)
+
+        return await super().handle(formatted)
+
+
+class JSONHandler(ConsoleHandler):
+    # JSON Lines: одна запись - одна строка
+    def make_log(self, record: LogRecord) -> str:
+        return json_log(record, self.fields)
+
+
+class Policy(str, Enum):
+    drop = "drop"  # Очередь переполнена - запись отбрасывается и учитывается в QueueHandler.dropped
+    block = "block"  # Очередь переполнена - корутина ждет места, event loop не блокируется
+
+
+_STOP = object()
+
+
+class QueueHandler(Handler):
+    # Запись только кладется в очередь; форматирование и запись в поток - в фоновом потоке пачками
+    def __init__(
+        self,
+        make_log: Callable[[LogRecord], str],
+        stream: TextIO = sys.stdout,
+        level: int = 0,
+        max_size: int = 10000,
+        policy: Policy = Policy.drop,
+        batch_size: int = 512,
+    ) -> None:
+        super().__init__(level=level)
+
+        self.make_log = make_log
+        self.stream = stream
+        self.policy = policy
+        self.batch_size = batch_size
+        self.dropped = 0
+
+        self.queue: queue.Queue = queue.Queue(maxsize=max_size)
+
+        self.worker = threading.Thread(target=self._work, name="asynclogger", daemon=True)
+        self.worker.start()
+
+    @property
+    def initialized(self) -> bool:
+        return self.worker.is_alive()
+
+    async def emit(self, record: LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            if self.policy is Policy.block:
+                await asyncio.to_thread(self.queue.put, record)
+            else:
+                self.dropped += 1
+
+    def _work(self) -> None:
+        while True:
+            batch = [self.queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            lines = list()
+            for record in batch:
+                if record is _STOP:
+                    continue
+                try:
+                    lines.append(self.make_log(record))
+                except Exception:
+                    self.dropped += 1
+
+            if lines:
+                self.stream.write("\n".join(lines) + "\n")
+                self.stream.flush()
+
+            if _STOP in batch:
+                return
+
+    async def close(self) -> None:
+        # Дописываем все, что уже в очереди
+        await asyncio.to_thread(self.queue.put, _STOP)
+        await asyncio.to_thread(self.worker.join)
@@ -1,5 +1,7 @@
 import logging
 import sys
+from functools import partial
+from typing import Callable
 from typing import Optional
 
 import structlog
@@ -9,7 +11,11 @@ from structlog._config import BoundLoggerLazyProxy
 
 from .adapter import BoundLoggerAdapter
 from .handlers import ConsoleHandler
+from .handlers import JSONHandler
 from .handlers import MockHandler
+from .handlers import Policy
+from .handlers import QueueHandler
+from .handlers import console_log
 
 PROXY_LOGGER = Logger()
 
@@ -32,6 +38,32 @@ def console_handler(level: str = "DEBUG", fields: Optional[list[str]] = None) ->
     )
 
 
+def json_handler(level: str = "DEBUG", fields: Optional[list[str]] = None) -> JSONHandler:
+    return JSONHandler(
+        stream=sys.stdout,
+        level=getattr(logging, level.upper()),
+        formatter=None,
+        filter=None,
+        fields=fields,
+    )
+
+
+def queue_handler(
+    level: str = "DEBUG",
+    fields: Optional[list[str]] = None,
+    max_size: int = 10000,
+    policy: str = Policy.drop.value,
+    make_log: Callable = console_log,
+) -> QueueHandler:
+    return QueueHandler(
+        make_log=partial(make_log, fields=fields),
+        stream=sys.stdout,
+        level=getattr(logging, level.upper()),
+        max_size=max_size,
+        policy=Policy(policy),
+    )
+
+
 def add_handler(handler: Handler) -> None:
     [PROXY_LOGGER.remove_handler(handler) for handler in PROXY_LOGGER.handlers if isinstance(handler, MockHandler)]
     PROXY_LOGGER.add_handler(handler)
@@ -39,3 +71,7 @@ def add_handler(handler: Handler) -> None:
 
 def get_logger(**kwargs) -> BoundLoggerLazyProxy:
     return structlog.get_logger(**kwargs)
+
+
+async def shutdown() -> None:
+    await PROXY_LOGGER.shutdown()
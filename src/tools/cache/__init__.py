@@ -0,0 +1,5 @@
+from .backends import Backend
+from .backends import MemoryBackend
+from .backends import RedisBackend
+from .cache import Cache
+from .exceptions import CacheError
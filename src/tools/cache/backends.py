@@ -0,0 +1,211 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Optional
+from typing import Union
+from urllib.parse import unquote
+from urllib.parse import urlsplit
+
+from .exceptions import CacheError
+
+
+class Backend:
+    # Без хранилища: всегда промах. Используется, когда кэш выключен
+    async def open(self) -> None:
+        pass
+
+    async def close(self) -> None:
+        pass
+
+    async def get_many(self, keys: list[str]) -> list[Optional[bytes]]:
+        return [None] * len(keys)
+
+    async def set_many(self, items: dict[str, bytes], ttl: int) -> None:
+        pass
+
+    async def delete(self, keys: list[str]) -> None:
+        pass
+
+    async def delete_prefix(self, prefix: str) -> None:
+        pass
+
+
+class MemoryBackend(Backend):
+    # LRU + TTL в памяти процесса: у каждого воркера свой кэш
+    def __init__(self, max_size: int = 10000) -> None:
+        self.max_size = max_size
+        self.items: OrderedDict[str, tuple[float, bytes]] = OrderedDict()
+
+    async def get_many(self, keys: list[str]) -> list[Optional[bytes]]:
+        now, values = time.monotonic(), []
+        for key in keys:
+            item = self.items.get(key)
+            if item is None:
+                values.append(None)
+            elif item[0] <= now:
+                del self.items[key]
+                values.append(None)
+            else:
+                self.items.move_to_end(key)
+                values.append(item[1])
+        return values
+
+    async def set_many(self, items: dict[str, bytes], ttl: int) -> None:
+        expires_at = time.monotonic() + ttl
+        for key, value in items.items():
+            self.items[key] = (expires_at, value)
+            self.items.move_to_end(key)
+
+        while len(self.items) > self.max_size:
+            self.items.popitem(last=False)
+
+    async def delete(self, keys: list[str]) -> None:
+        for key in keys:
+            self.items.pop(key, None)
+
+    async def delete_prefix(self, prefix: str) -> None:
+        await self.delete([key for key in self.items if key.startswith(prefix)])
+
+
+Reply = Union[None, int, bytes, list]
+
+
+class RedisBackend(Backend):
+    # Минимальный клиент протокола RESP2 (Redis, Valkey, KeyDB) поверх asyncio streams с пулом соединений.
+    # url: redis://[[username]:password@]host[:port][/db]
+    def __init__(self, url: str, pool_size: int = 10, timeout: float = 1) -> None:
+        parts = urlsplit(url)
+        self.host = parts.hostname or "localhost"
+        self.port = parts.port or 6379
+        self.username = unquote(parts.username) if parts.username else None
+        self.password = unquote(parts.password) if parts.password else None
+        self.db = int(parts.path.lstrip("/") or 0)
+
+        self.timeout = timeout
+
+        # Не больше pool_size соединений; свободные переиспользуются
+        self._semaphore = asyncio.Semaphore(pool_size)
+        self._idle: list[tuple[asyncio.StreamReader, asyncio.StreamWriter]] = []
+
+    async def close(self) -> None:
+        while self._idle:
+            _, writer = self._idle.pop()
+            writer.close()
+
+    async def get_many(self, keys: list[str]) -> list[Optional[bytes]]:
+        if not keys:
+            return []
+        (values,) = await self.execute(("MGET", *keys))
+        return values
+
+    async def set_many(self, items: dict[str, bytes], ttl: int) -> None:
+        # Пайплайн: все SET одной записью в сокет, ответы читаются следом
+        if items:
+            await self.execute(*[("SET", key, value, "PX", int(ttl * 1000)) for key, value in items.items()])
+
+    async def delete(self, keys: list[str]) -> None:
+        if keys:
+            await self.execute(("DEL", *keys))
+
+    async def delete_prefix(self, prefix: str) -> None:
+        pattern = "".join(f"\\{char}" if char in "*?[]\\" else char for char in prefix) + "*"
+        cursor = b"0"
+        while True:
+            ((cursor, keys),) = await self.execute(("SCAN", cursor, "MATCH", pattern, "COUNT", 1000))
+            await self.delete(keys)
+            if cursor == b"0":
+                return
+
+    async def execute(self, *commands: tuple) -> list[Reply]:
+        async with self._semaphore:
+            try:
+                if self._idle:
+                    try:
+                        replies = await self._send(self._idle.pop(), commands)
+                    except (OSError, EOFError):
+                        # Соединение пула сервер мог закрыть по idle timeout: повтор один раз на новом
+                        replies = await self._send(await self._connect(), commands)
+                else:
+                    replies = await self._send(await self._connect(), commands)
+            except (OSError, EOFError, asyncio.TimeoutError) as e:
+                raise CacheError(str(e)) from e
+
+        for reply in replies:
+            if isinstance(reply, CacheError):
+                raise reply
+        return replies
+
+    async def _send(
+        self, connection: tuple[asyncio.StreamReader, asyncio.StreamWriter], commands: tuple
+    ) -> list[Reply]:
+        reader, writer = connection
+        try:
+            writer.write(b"".join(self._encode(command) for command in commands))
+            replies = await asyncio.wait_for(self._read_replies(reader, len(commands)), self.timeout)
+        except BaseException as e:
+            # Часть ответов могла остаться непрочитанной - соединение в пул не возвращается
+            writer.close()
+            raise e
+        self._idle.append(connection)
+        return replies
+
+    async def _connect(self) -> tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+        try:
+            reader, writer = await asyncio.wait_for(asyncio.open_connection(self.host, self.port), self.timeout)
+        except (OSError, asyncio.TimeoutError) as e:
+            raise CacheError(str(e)) from e
+
+        commands = []
+        if self.password:
+            commands.append(("AUTH", *filter(None, [self.username, self.password])))
+        if self.db:
+            commands.append(("SELECT", self.db))
+
+        if commands:
+            writer.write(b"".join(self._encode(command) for command in commands))
+            for reply in await asyncio.wait_for(self._read_replies(reader, len(commands)), self.timeout):
+                if isinstance(reply, CacheError):
+                    writer.close()
+                    raise reply
+
+        return reader, writer
+
+    @classmethod
+    def _encode(cls, command: tuple) -> bytes:
+        parts = [f"*{len(command)}\r\n".encode()]
+        for arg in command:
+            if not isinstance(arg, (bytes, bytearray)):
+                arg = str(arg).encode("utf-8")
+            parts.append(f"${len(arg)}\r\n".encode())
+            parts.append(arg)
+            parts.append(b"\r\n")
+        return b"".join(parts)
+
+    @classmethod
+    async def _read_replies(cls, reader: asyncio.StreamReader, count: int) -> list[Reply]:
+        return [await cls._read(reader) for _ in range(count)]
+
+    @classmethod
+    async def _read(cls, reader: asyncio.StreamReader) -> Union[Reply, CacheError]:
+        line = await reader.readuntil(b"\r\n")
+        kind, payload = line[:1], line[1:-2]
+
+        if kind == b"+":
+            return payload
+        elif kind == b"-":
+            # Ошибка команды не ломает соединение - возвращается как значение
+            return CacheError(payload.decode("utf-8", errors="replace"))
+        elif kind == b":":
+            return int(payload)
+        elif kind == b"$":
+            size = int(payload)
+            if size < 0:
+                return None
+            return (await reader.readexactly(size + 2))[:-2]
+        elif kind == b"*":
+            size = int(payload)
+            if size < 0:
+                return None
+            return [await cls._read(reader) for _ in range(size)]
+
+        raise CacheError(f"Unexpected reply: {line!r}")
@@ -0,0 +1,49 @@
+from typing import Optional
+
+from .backends import Backend
+from .exceptions import CacheError
+
+
+class Cache:
+    def __init__(self, backend: Backend, ttl: int = 60, prefix: str = "") -> None:
+        self.backend = backend
+        self.ttl = ttl
+        self.prefix = prefix
+
+    def namespace(self, name: str, ttl: Optional[int] = None) -> "Cache":
+        # Ключи пространства имен: "<prefix><name>:<key>", общий backend
+        return Cache(self.backend, ttl=ttl or self.ttl, prefix=f"{self.prefix}{name}:")
+
+    async def open(self) -> None:
+        await self.backend.open()
+
+    async def close(self) -> None:
+        await self.backend.close()
+
+    async def get(self, key: str) -> Optional[bytes]:
+        (value,) = (await self.get_many([key])).values()
+        return value
+
+    async def get_many(self, keys: list[str]) -> dict[str, Optional[bytes]]:
+        # Недоступный кэш - промах: чтение идет в базу
+        try:
+            values = await self.backend.get_many([f"{self.prefix}{key}" for key in keys])
+        except CacheError:
+            values = [None] * len(keys)
+        return dict(zip(keys, values))
+
+    async def set(self, key: str, value: bytes, ttl: Optional[int] = None) -> None:
+        await self.set_many({key: value}, ttl)
+
+    async def set_many(self, items: dict[str, bytes], ttl: Optional[int] = None) -> None:
+        try:
+            await self.backend.set_many({f"{self.prefix}{key}": value for key, value in items.items()}, ttl or self.ttl)
+        except CacheError:
+            pass
+
+    async def delete(self, *keys: str) -> None:
+        # Ошибка инвалидации не подавляется: иначе кэш отдавал бы устаревшие данные до истечения TTL
+        await self.backend.delete([f"{self.prefix}{key}" for key in keys])
+
+    async def delete_namespace(self) -> None:
+        await self.backend.delete_prefix(self.prefix)
@@ -0,0 +1,6 @@
+from src.tools.exceptions import Error
+
+
+class CacheError(Error):
+    status_code = 503
+    description = "Cache unavailable"
@@ -1,74 +1,148 @@
+import itertools
 import json
 import re
+from collections import defaultdict
+from typing import Optional
 from typing import Union
 
 from fastapi import Request
 from fastapi import status
-from fastapi.responses import StreamingResponse
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.responses import Response
+from starlette.routing import Match
 from starlette.types import ASGIApp
+from starlette.types import Message
+from starlette.types import Receive
+from starlette.types import Scope
+from starlette.types import Send
 
+from src.tools import queries
+
+# Регулярные выражения по scope["path"]
 EXCLUDE_PATHS = {
-    r".+\/-/liveness",
-    r".+\/-/readiness",
-    r".+\/docs",
-    r".+\/redoc",
-    r".+\/openapi.json",
-    r".+\/favicon.ico",
+    r".*/-/liveness",
+    r".*/-/readiness",
+    r".*/-/pools",
+    r".*/-/statements",
+    r".*/docs",
+    r".*/redoc",
+    r".*/openapi\.json",
+    r".*/favicon\.ico",
 }
 
+# Сколько байт тела запроса/ответа попадает в лог
+MAX_BODY_SIZE = 4096
+
+
+class Prefix:
+    # Первые limit байт потока; остальное только считается, не буферизуется
+    def __init__(self, limit: int) -> None:
+        self.limit = limit
+        self.buffer = bytearray()
+        self.size = 0
+
+    def write(self, chunk: bytes) -> None:
+        self.size += len(chunk)
+        if len(self.buffer) < self.limit:
+            self.buffer += chunk[: self.limit - len(self.buffer)]
 
-class HTTPMiddleware(BaseHTTPMiddleware):
+    @property
+    def truncated(self) -> bool:
+        return self.size > len(self.buffer)
+
+
+class HTTPMiddleware:
     def __init__(
         self,
         app: ASGIApp,
         exclude_paths: list[str],
         logger=None,
+        max_body_size: int = MAX_BODY_SIZE,
+        sampling: Optional[dict[str, int]] = None,
     ) -> None:
-        super().__init__(app)
         self.app = app
         self.exclude_paths = exclude_paths
         self.logger = logger
+        self.max_body_size = max_body_size
 
-    async def dispatch(self, request: Request, call_next) -> Response:
-        if self.exclude_paths:
-            matches = next((path for path in self.exclude_paths if re.match(path, str(request.url))), None)
-            if matches:
-                return await call_next(request)
+        # Все исключения компилируются один раз в одну альтернативу
+        self.exclude = re.compile("|".join(f"(?:{path})" for path in exclude_paths)) if exclude_paths else None
 
-        return await self.handle(request, call_next)
+        # Сэмплирование: {regex пути: N} - логируется каждый N-й запрос каждого маршрута, подходящего под правило.
+        # Счетчик - на маршрут, а не на правило: иначе маршруты одного правила делили бы один счетчик
+        self.sampling = [(re.compile(path), rate) for path, rate in (sampling or {}).items()]
+        self.counters: dict[tuple, itertools.count] = defaultdict(itertools.count)
 
-    async def handle(self, request: Request, call_next) -> Response:  # noqa:C901
-        context = self.context(request)
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
 
-        if request.method in {"PATCH", "POST", "PUT"}:
-            context["body"] = await self.parse_body(request)
+        # Запросы к БД из обработчика учитываются в stats через contextvar - и для запросов без лога,
+        # чтобы у записей о медленных запросах был контекст запроса
+        stats = queries.track(method=scope["method"], path=scope["path"])
+
+        if self.exclude and self.exclude.match(scope["path"]):
+            return await self.app(scope, receive, send)
+
+        if not self.sampled(scope):
+            return await self.app(scope, receive, send)
+
+        await self.handle(Request(scope), receive, send, stats)
+
+    def sampled(self, scope: Scope) -> bool:
+        for pattern, rate in self.sampling:
+            if pattern.match(scope["path"]):
+                return next(self.counters[(pattern.pattern, *self.route(scope))]) % rate == 0
+        return True
+
+    @classmethod
+    def route(cls, scope: Scope) -> tuple[str, str]:
+        # Маршрут ("GET", "/v1/dummy/{id}"): роутер приложения еще не выполнялся, поэтому маршрут ищется
+        # здесь так же, как в нем. Путь без маршрута (404) - общий ключ, чтобы число счетчиков было ограничено
+        router = getattr(scope.get("app"), "router", None)
+        for route in getattr(router, "routes", []):
+            match, _ = route.matches(scope)
+            if match is Match.FULL:
+                return scope["method"], route.path
+        return scope["method"], ""
+
+    async def handle(self, request: Request, receive: Receive, send: Send, stats: queries.Stats) -> None:  # noqa:C901
+        context = self.context(request)
 
         await self.logger.info(f"HTTP Request: {request.method.upper()} {str(request.url)}", **context)
 
+        body, response = Prefix(self.max_body_size), Prefix(self.max_body_size)
+
+        # Тело запроса и ответа не буферизуется: копируем в лог только префикс и пропускаем сообщения дальше
+        async def _receive() -> Message:
+            message = await receive()
+            if message["type"] == "http.request":
+                body.write(message.get("body", b""))
+            return message
+
+        async def _send(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                context["code"] = message["status"]
+            elif message["type"] == "http.response.body":
+                response.write(message.get("body", b""))
+            await send(message)
+
         try:
-            response = await call_next(request)
+            await self.app(request.scope, _receive, _send)
         except Exception as e:
             context["code"] = status.HTTP_500_INTERNAL_SERVER_ERROR
+            if request.method in {"PATCH", "POST", "PUT"}:
+                context["body"] = self.parse_body(request, body)
+            context.update(stats.to_dict())
             await self.logger.error(f"HTTP Error: {request.method.upper()} {str(request.url)}", **context)
             raise e
 
-        content = await self.parse_response(response)
-
-        context["response"] = content
+        if request.method in {"PATCH", "POST", "PUT"}:
+            context["body"] = self.parse_body(request, body)
 
-        context["code"] = response.status_code
+        context["response"] = self.parse_response(response)
+        context.update(stats.to_dict())
 
         await self.logger.info(f"HTTP Response: {request.method.upper()} {str(request.url)}", **context)
 
-        return Response(
-            content=content,
-            status_code=response.status_code,
-            headers=dict(response.headers),
-            media_type=response.media_type,
-        )
-
     @classmethod
     def context(cls, request: Request) -> dict:
         headers = dict(request.headers.items())
@@ -92,33 +166,34 @@ class HTTPMiddleware(BaseHTTPMiddleware):
         }
 
     @classmethod
-    async def parse_body(cls, request: Request) -> Union[str, bytes]:
-        async def __receive() -> dict:
-            return {"type": "http.request", "body": body}
-
-        body: bytes = await request.body()
-
-        request._receive = __receive
-
-        payload = body
+    def parse_body(cls, request: Request, body: Prefix) -> Union[str, bytes, dict, list]:
+        payload = bytes(body.buffer)
         if not payload:
             return payload
 
-        if request.headers.get("Content-Type") == "application/json":
+        if request.headers.get("Content-Type") == "application/json" and not body.truncated:
             try:
-                payload = json.loads(body.decode("utf-8").replace("\n", ""))
-            except json.JSONDecodeError:
+                return json.loads(payload.decode("utf-8").replace("\n", ""))
+            except (json.JSONDecodeError, UnicodeDecodeError):
                 # FastAPI - сам по стеку поднимет 422 Error: Unprocessable Entity
                 ...
 
-        return payload
+        return cls.decode(body)
 
     @classmethod
-    async def parse_response(cls, response: StreamingResponse) -> Union[bytes, str]:
-        content = b""
-        async for chunk in response.body_iterator:
-            content += chunk
+    def parse_response(cls, response: Prefix) -> Union[str, bytes]:
+        return cls.decode(response)
+
+    @classmethod
+    def decode(cls, prefix: Prefix) -> Union[str, bytes]:
+        content = bytes(prefix.buffer)
         try:
-            return content.decode("utf-8")
+            # Префикс может разрезать многобайтовый символ - хвост отбрасываем
+            content = content.decode("utf-8", errors="ignore" if prefix.truncated else "strict")
         except UnicodeDecodeError:
             return content
+
+        if prefix.truncated:
+            return f"{content}...<{prefix.size} bytes>"
+
+        return content
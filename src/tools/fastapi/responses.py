@@ -0,0 +1,12 @@
+from typing import Any
+
+import orjson
+from fastapi.responses import JSONResponse
+
+
+class FastJSONResponse(JSONResponse):
+    # bytes - уже готовый JSON (например, Schema.response()), отдается как есть
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, (bytes, bytearray, memoryview)):
+            return bytes(content)
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
@@ -0,0 +1,68 @@
+import asyncio
+from typing import Any
+from typing import Awaitable
+from typing import Callable
+from typing import Hashable
+
+
+def _retrieve(future: asyncio.Future) -> None:
+    # Ошибку ключа может никто не дождаться (gather в load_many отдает только первую) - без этого asyncio
+    # пишет в лог "exception was never retrieved"
+    if not future.cancelled():
+        future.exception()
+
+
+class Loader:
+    # DataLoader: load(key), вызванные в одном тике event loop, собираются в один вызов batch(keys).
+    # batch возвращает {key: value}; для ключа без значения ожидающий получает error(key).
+    # Результаты запоминаются на время жизни загрузчика - он создается на один запрос
+    def __init__(
+        self,
+        batch: Callable[[list[Hashable]], Awaitable[dict[Hashable, Any]]],
+        error: Callable[[Hashable], Exception] = KeyError,
+    ) -> None:
+        self.batch = batch
+        self.error = error
+
+        self.futures: dict[Hashable, asyncio.Future] = dict()
+        self.queue: list[Hashable] = []
+        self.tasks: set[asyncio.Task] = set()  # Ссылки на запущенные пачки, чтобы их не собрал GC
+        # Пачки выполняются по очереди: сессия базы не допускает параллельных запросов
+        self.lock = asyncio.Lock()
+
+    async def load(self, key: Hashable) -> Any:
+        if key not in self.futures:
+            loop = asyncio.get_running_loop()
+            self.futures[key] = loop.create_future()
+            self.futures[key].add_done_callback(_retrieve)
+            self.queue.append(key)
+            if len(self.queue) == 1:
+                loop.call_soon(self._dispatch)
+
+        # Отмена одного ожидающего не отменяет future ключа, общий с другими
+        return await asyncio.shield(self.futures[key])
+
+    async def load_many(self, keys: list[Hashable]) -> list[Any]:
+        return list(await asyncio.gather(*[self.load(key) for key in keys]))
+
+    def _dispatch(self) -> None:
+        keys, self.queue = self.queue, []
+        task = asyncio.ensure_future(self._run(keys))
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+
+    async def _run(self, keys: list[Hashable]) -> None:
+        try:
+            async with self.lock:
+                values = await self.batch(keys)
+        except Exception as e:
+            for key in keys:
+                # Ошибку пачки не запоминаем: повторный load выполнит запрос заново
+                self.futures.pop(key).set_exception(e)
+            return
+
+        for key in keys:
+            if key in values:
+                self.futures[key].set_result(values[key])
+            else:
+                self.futures[key].set_exception(self.error(key))
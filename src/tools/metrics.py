@@ -0,0 +1,30 @@
+import bisect
+import threading
+
+# Границы бакетов в секундах
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram:
+    def __init__(self, buckets: tuple[float, ...] = BUCKETS) -> None:
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self._lock = threading.Lock()  # События pymongo приходят из потоков executor'а
+
+    def observe(self, value: float) -> None:
+        with self._lock:
+            self.counts[bisect.bisect_left(self.buckets, value)] += 1
+            self.count += 1
+            self.sum += value
+
+    def to_dict(self) -> dict:
+        # Кумулятивные значения как в Prometheus: le_0.01 - число наблюдений <= 0.01
+        buckets, cumulative = dict(), 0
+        for bucket, count in zip(self.buckets, self.counts):
+            cumulative += count
+            buckets[f"le_{bucket}"] = cumulative
+        buckets["le_inf"] = self.count
+
+        return dict(count=self.count, sum=round(self.sum, 6), buckets=buckets)
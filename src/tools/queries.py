@@ -0,0 +1,121 @@
+import asyncio
+import re
+import threading
+from contextvars import ContextVar
+from typing import Any
+from typing import Callable
+from typing import NamedTuple
+from typing import Optional
+
+# Сколько символов нормализованного запроса попадает в лог медленных запросов
+MAX_STATEMENT_LENGTH = 2048
+
+
+class Query(NamedTuple):
+    database: str
+    statement: str  # Нормализованный текст без значений параметров
+    duration: float  # Секунды
+    rows: Optional[int]  # None - драйвер не сообщает число строк
+
+
+class Stats:
+    # Запросы к БД в рамках одного HTTP-запроса. События pymongo приходят из потоков executor'а
+    def __init__(self, **context: Any) -> None:
+        self.context = context  # Контекст запроса для лога медленных запросов
+        self.count = 0
+        self.time = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, duration: float, count: int = 1) -> None:
+        with self._lock:
+            self.count += count
+            self.time += duration
+
+    def merge(self, stats: "Stats") -> None:
+        self.observe(stats.time, stats.count)
+
+    def to_dict(self) -> dict:
+        return dict(db_queries=self.count, db_time=round(self.time, 6))
+
+
+class SlowLog:
+    # Запросы дольше порога пишутся сразу из слушателей драйверов - для любого запроса, в том числе
+    # исключенного из лога HTTPMiddleware или отброшенного сэмплированием, и вне HTTP-запросов
+    def __init__(self) -> None:
+        self.threshold: Optional[float] = None
+        self.logger = None
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.tasks: set[asyncio.Future] = set()  # Ссылки на задачи записи, чтобы их не собрал GC
+
+    def start(self, logger, threshold: Optional[float]) -> None:
+        self.logger, self.threshold = logger, threshold
+        self.loop = asyncio.get_running_loop()
+
+    def stop(self) -> None:
+        self.threshold, self.logger, self.loop = None, None, None
+
+    def is_slow(self, duration: float) -> bool:
+        return self.threshold is not None and duration >= self.threshold
+
+    def write(self, query: Query, context: dict) -> None:
+        # Слушатель pymongo вызывается в потоке executor'а: запись в лог планируется в event loop
+        loop = self.loop
+        if loop is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(self._write, query, context)
+
+    def _write(self, query: Query, context: dict) -> None:
+        if self.logger is None:
+            return
+        task = asyncio.ensure_future(
+            self.logger.warning(
+                f"Slow query: {query.database} {query.duration:.3f}s",
+                **context,
+                database=query.database,
+                statement=query.statement,
+                duration=round(query.duration, 6),
+                rows=query.rows,
+            )
+        )
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+
+
+slow_log = SlowLog()
+
+_stats: ContextVar[Optional[Stats]] = ContextVar("query_stats", default=None)
+
+
+def track(**context: Any) -> Stats:
+    # Вызывается в начале запроса; задачи и потоки, запущенные из него, наследуют контекст и пишут в тот же Stats
+    stats = Stats(**context)
+    _stats.set(stats)
+    return stats
+
+
+def current() -> Optional[Stats]:
+    return _stats.get()
+
+
+def use(stats: Stats) -> None:
+    _stats.set(stats)
+
+
+def observe(database: str, statement: Callable[[], str], duration: float, rows: Optional[int] = None) -> None:
+    # Текст запроса нормализуется только для медленных: на горячем пути это лишняя работа
+    stats = _stats.get()
+    if stats is not None:
+        stats.observe(duration)
+
+    if slow_log.is_slow(duration):
+        slow_log.write(Query(database, statement(), duration, rows), stats.context if stats is not None else {})
+
+
+_WHITESPACE = re.compile(r"\s+")
+_PARAMETER = re.compile(r"\$\d+|%\(\w+\)s")
+_VALUES = re.compile(r"(\([?, ]+\))(?:, \([?, ]+\))+")
+
+
+def normalize(statement: str) -> str:
+    # Один вид запроса - одна строка: параметры заменяются на ?, многострочный VALUES сворачивается
+    statement = _PARAMETER.sub("?", _WHITESPACE.sub(" ", statement).strip())
+    return _VALUES.sub(r"\1, ...", statement)[:MAX_STATEMENT_LENGTH]
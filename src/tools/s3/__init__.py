@@ -1,3 +1,4 @@
 from .enums import Mimetype
 from .enums import Storage
+from .exceptions import S3Error
 from .uploader import S3
@@ -0,0 +1,41 @@
+# Последовательные операции против *_many на S3 в памяти: python -m src.tools.s3.benchmark [count] [latency_ms]
+import asyncio
+import sys
+import time
+
+from .enums import Mimetype
+from .enums import Storage
+from .stub import StubClient
+from .uploader import S3
+
+
+async def main(count: int = 200, latency: int = 20) -> None:
+    s3 = S3(bucket="benchmark", endpoint_url="http://stub", aws_access_key_id="", aws_secret_access_key="")
+    await s3.open(client=StubClient(latency=latency / 1000))
+
+    mimetype, storage = Mimetype.png, Storage.account
+    files = {f"file-{i}": b"x" * 1024 for i in range(count)}
+
+    async def sequential() -> None:
+        for filename, content in files.items():
+            await s3.upload(content, filename=filename, mimetype=mimetype, storage=storage)
+        for filename in files:
+            await s3.download(filename, mimetype=mimetype, storage=storage)
+        for filename in files:
+            await s3.delete(filename, mimetype=mimetype, storage=storage)
+
+    async def bulk() -> None:
+        await s3.upload_many(files, mimetype=mimetype, storage=storage)
+        await s3.download_many(list(files), mimetype=mimetype, storage=storage)
+        await s3.delete_many(list(files), mimetype=mimetype, storage=storage)
+
+    for name, run in [("sequential", sequential), ("many", bulk)]:
+        start = time.perf_counter()
+        await run()
+        print(f"{name:<12} {time.perf_counter() - start:>8.3f}s")
+
+    await s3.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main(*[int(arg) for arg in sys.argv[1:]]))
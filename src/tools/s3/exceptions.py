@@ -0,0 +1,6 @@
+from src.tools.exceptions import Error
+
+
+class S3Error(Error):
+    status_code = 502
+    description = "S3 operation failed"
@@ -0,0 +1,104 @@
+import asyncio
+import hashlib
+import uuid
+from typing import Optional
+
+
+class StubBody:
+    def __init__(self, content: bytes) -> None:
+        self.content = content
+        self.position = 0
+
+    async def __aenter__(self) -> "StubBody":
+        return self
+
+    async def __aexit__(self, *args) -> None:
+        pass
+
+    async def read(self, size: Optional[int] = None) -> bytes:
+        end = len(self.content) if size is None else self.position + size
+        chunk = self.content[self.position : end]
+        self.position += len(chunk)
+        return chunk
+
+
+class StubClient:
+    # S3-клиент в памяти: для локальной разработки и бенчмарков без сети.
+    # latency - имитация сетевой задержки на каждый запрос, в секундах
+    def __init__(self, latency: float = 0) -> None:
+        self.latency = latency
+        self.objects: dict[tuple[str, str], dict] = dict()
+        self.uploads: dict[str, dict[int, bytes]] = dict()
+        self.requests = 0
+
+    async def __aenter__(self) -> "StubClient":
+        return self
+
+    async def __aexit__(self, *args) -> None:
+        pass
+
+    async def _request(self) -> None:
+        self.requests += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+    def _get(self, Bucket: str, Key: str) -> dict:
+        try:
+            return self.objects[(Bucket, Key)]
+        except KeyError:
+            raise KeyError(f"NoSuchKey: {Key}")
+
+    async def put_object(self, Bucket: str, Key: str, Body: bytes, ContentType: str = None) -> dict:
+        await self._request()
+        body = bytes(Body)
+        self.objects[(Bucket, Key)] = dict(Body=body, ContentType=ContentType, ETag=hashlib.md5(body).hexdigest())
+        return dict(ETag=self.objects[(Bucket, Key)]["ETag"])
+
+    async def head_object(self, Bucket: str, Key: str) -> dict:
+        await self._request()
+        obj = self._get(Bucket, Key)
+        return dict(ContentLength=len(obj["Body"]), ContentType=obj["ContentType"], ETag=obj["ETag"])
+
+    async def get_object(self, Bucket: str, Key: str, Range: Optional[str] = None) -> dict:
+        await self._request()
+        body = self._get(Bucket, Key)["Body"]
+        if Range:
+            start, end = Range.removeprefix("bytes=").split("-")
+            body = body[int(start or 0) : int(end) + 1 if end else None]
+        return dict(Body=StubBody(body), ContentLength=len(body))
+
+    async def delete_object(self, Bucket: str, Key: str) -> dict:
+        await self._request()
+        self.objects.pop((Bucket, Key), None)
+        return dict()
+
+    async def delete_objects(self, Bucket: str, Delete: dict) -> dict:
+        await self._request()
+        deleted = list()
+        for obj in Delete["Objects"]:
+            self.objects.pop((Bucket, obj["Key"]), None)
+            deleted.append(dict(Key=obj["Key"]))
+        return dict() if Delete.get("Quiet") else dict(Deleted=deleted)
+
+    async def create_multipart_upload(self, Bucket: str, Key: str, ContentType: str = None) -> dict:
+        await self._request()
+        upload_id = uuid.uuid4().hex
+        self.uploads[upload_id] = dict()
+        return dict(UploadId=upload_id)
+
+    async def upload_part(self, Bucket: str, Key: str, UploadId: str, PartNumber: int, Body: bytes) -> dict:
+        await self._request()
+        self.uploads[UploadId][PartNumber] = bytes(Body)
+        return dict(ETag=hashlib.md5(Body).hexdigest())
+
+    async def complete_multipart_upload(self, Bucket: str, Key: str, UploadId: str, MultipartUpload: dict) -> dict:
+        await self._request()
+        parts = self.uploads.pop(UploadId)
+        body = b"".join(parts[part["PartNumber"]] for part in MultipartUpload["Parts"])
+        self.objects[(Bucket, Key)] = dict(Body=body, ContentType=None, ETag=hashlib.md5(body).hexdigest())
+        return dict()
+
+    async def abort_multipart_upload(self, Bucket: str, Key: str, UploadId: str) -> dict:
+        await self._request()
+        self.uploads.pop(UploadId, None)
+        return dict()
@@ -1,10 +1,29 @@
+import asyncio
+from contextlib import AsyncExitStack
 from contextlib import asynccontextmanager
+from typing import Any
+from typing import AsyncIterator
+from typing import Awaitable
+from typing import Callable
+from typing import Optional
+from typing import Union
 
 import aioboto3
-import aiofiles
+from aiobotocore.config import AioConfig
 
 from .enums import Mimetype
 from .enums import Storage
+from .exceptions import S3Error
+
+# Минимальный размер части multipart upload (кроме последней) - 5 MiB
+PART_SIZE = 5 * 1024 * 1024
+
+CHUNK_SIZE = 64 * 1024
+
+# Максимум ключей в одном запросе DeleteObjects
+DELETE_BATCH_SIZE = 1000
+
+CONCURRENCY = 10
 
 
 class S3:
@@ -13,20 +32,62 @@ class S3:
     aws_access_key_id: str = None
     aws_secret_access_key: str = None
 
-    def __init__(self, bucket: str, endpoint_url: str, aws_access_key_id: str, aws_secret_access_key: str) -> None:
+    def __init__(
+        self,
+        bucket: str,
+        endpoint_url: str,
+        aws_access_key_id: str,
+        aws_secret_access_key: str,
+        max_pool_connections: int = 10,
+        keepalive_timeout: float = 12,
+        max_attempts: int = 3,
+        retry_mode: str = "standard",
+    ) -> None:
         self.bucket = bucket
         self.endpoint_url = endpoint_url
         self.aws_access_key_id = aws_access_key_id
         self.aws_secret_access_key = aws_secret_access_key
 
-    @asynccontextmanager
-    async def client(self):
-        async with aioboto3.Session().client(
+        self.config = AioConfig(
+            max_pool_connections=max_pool_connections,
+            connector_args=dict(keepalive_timeout=keepalive_timeout),
+            retries=dict(max_attempts=max_attempts, mode=retry_mode),
+        )
+
+        self._session = aioboto3.Session()
+        self._stack: Optional[AsyncExitStack] = None
+        self._client = None
+
+    def _create_client(self):
+        return self._session.client(
             "s3",
             endpoint_url=self.endpoint_url,
             aws_access_key_id=self.aws_access_key_id,
             aws_secret_access_key=self.aws_secret_access_key,
-        ) as _client:
+            config=self.config,
+        )
+
+    async def open(self, client=None) -> None:
+        # Один клиент (и пул HTTP-соединений) на все время жизни приложения.
+        # client - готовый клиент, например tools.s3.stub.StubClient для работы без S3
+        if self._client is not None:
+            return
+        self._stack = AsyncExitStack()
+        self._client = await self._stack.enter_async_context(client or self._create_client())
+
+    async def close(self) -> None:
+        if self._stack is not None:
+            await self._stack.aclose()
+        self._stack, self._client = None, None
+
+    @asynccontextmanager
+    async def client(self):
+        if self._client is not None:
+            yield self._client
+            return
+
+        # Клиент не открыт (например, в скриптах вне lifespan) - временный клиент на одну операцию
+        async with self._create_client() as _client:
             yield _client
 
     def file_uri(self, filename: str, mimetype: Mimetype, storage: Storage) -> str:
@@ -40,27 +101,112 @@ class S3:
     def file_name(cls, filename: str, mimetype: Mimetype) -> str:
         return f"{filename}{mimetype.format}"
 
-    async def upload(self, file: bytes, filename: str, mimetype: Mimetype, storage: Storage) -> None:
-        async with aiofiles.tempfile.NamedTemporaryFile("wb", suffix=mimetype.format) as tmp:
-            await tmp.write(file)
-            async with self.client() as client:
-                await client.upload_file(
-                    Filename=tmp.name,
+    async def upload(
+        self,
+        file: Union[bytes, AsyncIterator[bytes]],
+        filename: str,
+        mimetype: Mimetype,
+        storage: Storage,
+    ) -> None:
+        if not isinstance(file, (bytes, bytearray, memoryview)):
+            return await self.upload_stream(file, filename=filename, mimetype=mimetype, storage=storage)
+
+        async with self.client() as client:
+            await client.put_object(
+                Bucket=self.bucket,
+                Key=self.file_path(filename=filename, mimetype=mimetype, storage=storage),
+                Body=file,
+                ContentType=mimetype.value,
+            )
+
+    async def upload_stream(
+        self,
+        stream: AsyncIterator[bytes],
+        filename: str,
+        mimetype: Mimetype,
+        storage: Storage,
+        part_size: int = PART_SIZE,
+    ) -> None:
+        key = self.file_path(filename=filename, mimetype=mimetype, storage=storage)
+
+        async with self.client() as client:
+            upload_id, parts, buffer = None, [], bytearray()
+
+            try:
+                async for chunk in stream:
+                    buffer += chunk
+                    if len(buffer) < part_size:
+                        continue
+
+                    # Multipart создается только когда данных набралось хотя бы на одну часть
+                    if upload_id is None:
+                        upload = await client.create_multipart_upload(
+                            Bucket=self.bucket,
+                            Key=key,
+                            ContentType=mimetype.value,
+                        )
+                        upload_id = upload["UploadId"]
+
+                    parts.append(await self._upload_part(client, key, upload_id, len(parts) + 1, bytes(buffer)))
+                    buffer.clear()
+
+                if upload_id is None:
+                    await client.put_object(Bucket=self.bucket, Key=key, Body=bytes(buffer), ContentType=mimetype.value)
+                    return
+
+                if buffer:
+                    parts.append(await self._upload_part(client, key, upload_id, len(parts) + 1, bytes(buffer)))
+
+                await client.complete_multipart_upload(
                     Bucket=self.bucket,
-                    Key=self.file_path(filename=filename, mimetype=mimetype, storage=storage),
+                    Key=key,
+                    UploadId=upload_id,
+                    MultipartUpload={"Parts": parts},
                 )
+            except BaseException as e:
+                if upload_id is not None:
+                    await client.abort_multipart_upload(Bucket=self.bucket, Key=key, UploadId=upload_id)
+                raise e
+
+    async def _upload_part(self, client, key: str, upload_id: str, number: int, body: bytes) -> dict:
+        part = await client.upload_part(Bucket=self.bucket, Key=key, UploadId=upload_id, PartNumber=number, Body=body)
+        return {"ETag": part["ETag"], "PartNumber": number}
+
+    async def head(self, filename: str, mimetype: Mimetype, storage: Storage) -> dict:
+        async with self.client() as client:
+            return await client.head_object(
+                Bucket=self.bucket,
+                Key=self.file_path(filename=filename, mimetype=mimetype, storage=storage),
+            )
 
     async def download(self, filename: str, mimetype: Mimetype, storage: Storage) -> bytes:
-        async with aiofiles.tempfile.NamedTemporaryFile() as tmp:
-            async with self.client() as client:
-                await client.download_file(
-                    Filename=tmp.name,
-                    Bucket=self.bucket,
-                    Key=self.file_path(filename=filename, mimetype=mimetype, storage=storage),
-                )
-                await tmp.seek(0)
-                file = await tmp.read()
-        return file
+        async with self.client() as client:
+            response = await client.get_object(
+                Bucket=self.bucket,
+                Key=self.file_path(filename=filename, mimetype=mimetype, storage=storage),
+            )
+            async with response["Body"] as body:
+                return await body.read()
+
+    async def download_stream(
+        self,
+        filename: str,
+        mimetype: Mimetype,
+        storage: Storage,
+        start: Optional[int] = None,
+        end: Optional[int] = None,
+        chunk_size: int = CHUNK_SIZE,
+    ) -> AsyncIterator[bytes]:
+        # start/end - включительные границы байт (HTTP Range), например для проксирования видео
+        kwargs = dict(Bucket=self.bucket, Key=self.file_path(filename=filename, mimetype=mimetype, storage=storage))
+        if start is not None or end is not None:
+            kwargs["Range"] = f"bytes={start or 0}-{'' if end is None else end}"
+
+        async with self.client() as client:
+            response = await client.get_object(**kwargs)
+            async with response["Body"] as body:
+                while chunk := await body.read(chunk_size):
+                    yield chunk
 
     async def delete(self, filename: str, mimetype: Mimetype, storage: Storage) -> None:
         async with self.client() as client:
@@ -68,3 +214,78 @@ class S3:
                 Bucket=self.bucket,
                 Key=self.file_path(filename=filename, mimetype=mimetype, storage=storage),
             )
+
+    async def upload_many(
+        self,
+        files: dict[str, bytes],
+        mimetype: Mimetype,
+        storage: Storage,
+        concurrency: int = CONCURRENCY,
+    ) -> dict[str, Optional[Exception]]:
+        # {filename: None} - успешно, {filename: Exception} - ошибка по этому файлу
+        async def _upload(filename: str) -> None:
+            await self.upload(files[filename], filename=filename, mimetype=mimetype, storage=storage)
+
+        return await self._map(list(files), _upload, concurrency)
+
+    async def download_many(
+        self,
+        filenames: list[str],
+        mimetype: Mimetype,
+        storage: Storage,
+        concurrency: int = CONCURRENCY,
+    ) -> dict[str, Union[bytes, Exception]]:
+        async def _download(filename: str) -> bytes:
+            return await self.download(filename, mimetype=mimetype, storage=storage)
+
+        return await self._map(filenames, _download, concurrency)
+
+    async def delete_many(
+        self,
+        filenames: list[str],
+        mimetype: Mimetype,
+        storage: Storage,
+        concurrency: int = CONCURRENCY,
+    ) -> dict[str, Optional[Exception]]:
+        keys = {
+            self.file_path(filename=filename, mimetype=mimetype, storage=storage): filename for filename in filenames
+        }
+
+        async def _delete(batch: list[str]) -> dict[str, Optional[Exception]]:
+            async with self.client() as client:
+                response = await client.delete_objects(
+                    Bucket=self.bucket,
+                    Delete={"Objects": [{"Key": key} for key in batch], "Quiet": True},
+                )
+            # В Quiet-режиме в ответе только ключи с ошибками
+            errors = {e["Key"]: S3Error(f"{e['Code']}: {e['Message']}") for e in response.get("Errors", [])}
+            return {keys[key]: errors.get(key) for key in batch}
+
+        paths = list(keys)
+        batches = [paths[i : i + DELETE_BATCH_SIZE] for i in range(0, len(paths), DELETE_BATCH_SIZE)]
+
+        results = dict()
+        for index, result in (await self._map(range(len(batches)), lambda i: _delete(batches[i]), concurrency)).items():
+            if isinstance(result, Exception):  # Упал весь запрос - ошибка у каждого ключа пачки
+                result = {keys[key]: result for key in batches[index]}
+            results.update(result)
+        return results
+
+    @classmethod
+    async def _map(
+        cls,
+        items: list,
+        operation: Callable[[Any], Awaitable[Any]],
+        concurrency: int,
+    ) -> dict[Any, Any]:
+        # Не более concurrency операций одновременно; ошибка одной операции не прерывает остальные
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def _run(item: Any) -> Any:
+            async with semaphore:
+                try:
+                    return await operation(item)
+                except Exception as e:
+                    return e
+
+        return dict(zip(items, await asyncio.gather(*[_run(item) for item in items])))
@@ -0,0 +1,62 @@
+import asyncio
+from functools import wraps
+from typing import Any
+from typing import Awaitable
+from typing import Callable
+from typing import Hashable
+from typing import Optional
+
+from src.tools import queries
+
+
+class SingleFlight:
+    # Одновременные вызовы с одним ключом ждут одну задачу, а не выполняют работу повторно.
+    # Результат не кэшируется: после завершения задачи следующий вызов выполняется заново
+    def __init__(self) -> None:
+        self.calls: dict[Hashable, tuple[asyncio.Task, queries.Stats]] = dict()
+
+    async def do(self, key: Hashable, factory: Callable[[], Awaitable[Any]]) -> Any:
+        call = self.calls.get(key)
+        if call is None:
+            # Общая задача считает запросы к БД в свой Stats, а не в Stats первого вызвавшего
+            leader = queries.current()
+            stats = queries.Stats(**(leader.context if leader is not None else {}))
+            call = asyncio.ensure_future(self._run(factory, stats)), stats
+            self.calls[key] = call
+            call[0].add_done_callback(lambda _: self.calls.pop(key, None))
+
+        task, stats = call
+        try:
+            # Отмена одного ожидающего (клиент оборвал запрос) не отменяет общую задачу для остальных
+            return await asyncio.shield(task)
+        finally:
+            # Каждый ожидающий видит время БД, потраченное на его ответ
+            if task.done() and (current := queries.current()) is not None:
+                current.merge(stats)
+
+    @classmethod
+    async def _run(cls, factory: Callable[[], Awaitable[Any]], stats: queries.Stats) -> Any:
+        queries.use(stats)
+        return await factory()
+
+
+def singleflight(
+    func: Optional[Callable[..., Awaitable[Any]]] = None,
+    bypass: Optional[Callable[[], bool]] = None,
+) -> Any:
+    # Ключ - аргументы вызова (для classmethod - включая класс), они должны быть hashable.
+    # Все ожидающие получают один и тот же объект результата.
+    # bypass() -> True - вызов выполняется сам, без общей задачи: ее контекст (например, привязка чтения
+    # к primary после записи) - контекст первого вызвавшего
+    def decorator(func: Callable[..., Awaitable[Any]]) -> Callable[..., Awaitable[Any]]:
+        group = SingleFlight()
+
+        @wraps(func)
+        async def wrapper(*args, **kwargs) -> Any:
+            if bypass is not None and bypass():
+                return await func(*args, **kwargs)
+            return await group.do((args, tuple(sorted(kwargs.items()))), lambda: func(*args, **kwargs))
+
+        return wrapper
+
+    return decorator(func) if func is not None else decorator
@@ -0,0 +1,169 @@
+import asyncio
+import fnmatch
+import time
+from typing import Any
+from typing import AsyncIterator
+from typing import Optional
+
+import pytest
+import pytest_asyncio
+
+from src.tools.cache import Cache
+from src.tools.cache import CacheError
+from src.tools.cache import RedisBackend
+
+
+class FakeRedis:
+    # Локальный RESP2-сервер с командами, которые использует RedisBackend: MGET, SET PX, DEL, SCAN, AUTH, SELECT
+    def __init__(self) -> None:
+        self.store: dict[bytes, tuple[bytes, Optional[float]]] = dict()
+        self.commands: list[list[bytes]] = list()
+        self.writers: list[asyncio.StreamWriter] = list()
+
+    def get(self, key: bytes) -> Optional[bytes]:
+        value, expires_at = self.store.get(key, (None, None))
+        if expires_at is not None and expires_at <= time.monotonic():
+            self.store.pop(key, None)
+            return None
+        return value
+
+    def execute(self, args: list[bytes]) -> Any:
+        command, *args = args
+        command = command.upper()
+        if command == b"MGET":
+            return [self.get(key) for key in args]
+        elif command == b"SET":
+            key, value, *options = args
+            expires_at = None
+            if options and options[0].upper() == b"PX":
+                expires_at = time.monotonic() + int(options[1]) / 1000
+            self.store[key] = (value, expires_at)
+            return "OK"
+        elif command == b"DEL":
+            return sum(self.store.pop(key, None) is not None for key in args)
+        elif command == b"SCAN":
+            pattern = args[2].decode()
+            return [b"0", [key for key in list(self.store) if fnmatch.fnmatchcase(key.decode(), pattern)]]
+        elif command in {b"AUTH", b"SELECT"}:
+            return "OK"
+        return Exception(f"ERR unknown command '{command.decode()}'")
+
+    @classmethod
+    def encode(cls, value: Any) -> bytes:
+        if value is None:
+            return b"$-1\r\n"
+        elif isinstance(value, Exception):
+            return f"-{value}\r\n".encode()
+        elif isinstance(value, str):
+            return f"+{value}\r\n".encode()
+        elif isinstance(value, int):
+            return f":{value}\r\n".encode()
+        elif isinstance(value, list):
+            return f"*{len(value)}\r\n".encode() + b"".join(cls.encode(item) for item in value)
+        return f"${len(value)}\r\n".encode() + value + b"\r\n"
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.writers.append(writer)
+        while line := await reader.readline():
+            args = []
+            for _ in range(int(line[1:-2])):
+                size = int((await reader.readline())[1:-2])
+                args.append((await reader.readexactly(size + 2))[:-2])
+            self.commands.append(args)
+            writer.write(self.encode(self.execute(args)))
+            await writer.drain()
+        writer.close()
+
+
+@pytest_asyncio.fixture()
+async def server() -> AsyncIterator[tuple[FakeRedis, int]]:
+    fake = FakeRedis()
+    server = await asyncio.start_server(fake.handle, "127.0.0.1", 0)
+    yield fake, server.sockets[0].getsockname()[1]
+    server.close()
+    await server.wait_closed()
+
+
+@pytest_asyncio.fixture()
+async def backend(server: tuple[FakeRedis, int]) -> AsyncIterator[RedisBackend]:
+    _, port = server
+    backend = RedisBackend(f"redis://:secret@127.0.0.1:{port}/2", pool_size=2)
+    yield backend
+    await backend.close()
+
+
+@pytest.mark.asyncio()
+async def test_set_get_delete(backend: RedisBackend) -> None:
+    await backend.set_many({"a": b"1", "b": b"2"}, ttl=60)
+
+    assert await backend.get_many(["a", "b", "c"]) == [b"1", b"2", None]
+
+    await backend.delete(["a"])
+
+    assert await backend.get_many(["a", "b"]) == [None, b"2"]
+
+
+@pytest.mark.asyncio()
+async def test_ttl(backend: RedisBackend) -> None:
+    await backend.set_many({"a": b"1"}, ttl=0.05)
+
+    assert await backend.get_many(["a"]) == [b"1"]
+
+    await asyncio.sleep(0.1)
+
+    assert await backend.get_many(["a"]) == [None]
+
+
+@pytest.mark.asyncio()
+async def test_connect_authenticates_and_selects_db(server: tuple[FakeRedis, int], backend: RedisBackend) -> None:
+    fake, _ = server
+
+    await backend.get_many(["a"])
+
+    assert fake.commands[:2] == [[b"AUTH", b"secret"], [b"SELECT", b"2"]]
+
+
+@pytest.mark.asyncio()
+async def test_delete_namespace(backend: RedisBackend) -> None:
+    cache = Cache(backend, ttl=60)
+    dummy, other = cache.namespace("dummy"), cache.namespace("other")
+    await dummy.set("1", b"x")
+    await other.set("1", b"y")
+
+    await dummy.delete_namespace()
+
+    assert await dummy.get("1") is None
+    assert await other.get("1") == b"y"
+
+
+@pytest.mark.asyncio()
+async def test_command_error(backend: RedisBackend) -> None:
+    with pytest.raises(CacheError):
+        await backend.execute(("UNKNOWN",))
+
+    # Ошибка команды не ломает соединение
+    assert await backend.get_many(["a"]) == [None]
+
+
+@pytest.mark.asyncio()
+async def test_reconnects_after_idle_timeout(server: tuple[FakeRedis, int], backend: RedisBackend) -> None:
+    fake, _ = server
+    await backend.set_many({"a": b"1"}, ttl=60)
+
+    # Сервер закрывает простаивающие соединения
+    for writer in fake.writers:
+        writer.close()
+    await asyncio.sleep(0.01)
+
+    assert await backend.get_many(["a"]) == [b"1"]
+
+
+@pytest.mark.asyncio()
+async def test_unavailable_server_is_a_miss() -> None:
+    cache = Cache(RedisBackend("redis://127.0.0.1:1", timeout=0.1))
+
+    await cache.set("a", b"1")
+
+    assert await cache.get("a") is None
+    with pytest.raises(CacheError):
+        await cache.delete("a")